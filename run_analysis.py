@@ -10,7 +10,7 @@ Ce script:
 """
 
 import os
-import sys
+import argparse
 import subprocess
 import glob
 import logging
@@ -29,24 +29,27 @@ def ensure_directory(directory):
         os.makedirs(directory)
         logger.info(f"Répertoire '{directory}' créé.")
 
-def run_scraper():
-    """Lance le script de scraping."""
-    logger.info("Lancement du script de scraping...")
-    
-    # Chemin vers le script de scraping
-    scraper_path = os.path.join("scraper", "brvm_scraper.py")
-    
-    if not os.path.exists(scraper_path):
-        logger.error(f"Script de scraping non trouvé: {scraper_path}")
-        return False
+def run_scraper(force_refresh=False):
+    """Lance le scraping dans le processus courant."""
+    logger.info("Lancement du scraping...")
     
     try:
-        # Exécuter le script de scraping
-        subprocess.run([sys.executable, scraper_path], check=True)
-        logger.info("Script de scraping exécuté avec succès.")
+        # Import direct plutôt qu'un sous-processus: pas de second interpréteur,
+        # et la session HTTP, son cache et la configuration du logging sont partagés
+        from scraper.brvm_scraper import BRVMScraper
+        
+        scraper = BRVMScraper()
+        if force_refresh:
+            scraper.clear_cache()
+            logger.info("Cache vidé.")
+        # Sans --force-refresh, seules les dates absentes des fichiers existants
+        # sont récupérées
+        scraper.get_all_historical_data(incremental=not force_refresh)
+        
+        logger.info("Scraping exécuté avec succès.")
         return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Erreur lors de l'exécution du script de scraping: {str(e)}")
+    except Exception as e:
+        logger.error(f"Erreur lors de l'exécution du scraping: {str(e)}")
         return False
 
 def check_data():
@@ -66,6 +69,10 @@ def check_data():
     
     logger.info(f"{len(csv_files)} fichiers CSV trouvés.")
     
+    parquet_files = glob.glob(os.path.join(data_dir, "*.parquet"))
+    if parquet_files:
+        logger.info(f"{len(parquet_files)} fichiers Parquet trouvés.")
+    
     return True
 
 def launch_notebook():
@@ -89,6 +96,11 @@ def launch_notebook():
 
 def main():
     """Fonction principale."""
+    parser = argparse.ArgumentParser(description="Analyse complète des données de la BRVM")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="Ignorer les caches et retélécharger toutes les données")
+    args = parser.parse_args()
+    
     logger.info("Démarrage de l'analyse des données de la BRVM...")
     
     # S'assurer que les répertoires nécessaires existent
@@ -96,7 +108,7 @@ def main():
     ensure_directory("notebooks")
     
     # Lancer le scraping
-    if not run_scraper():
+    if not run_scraper(force_refresh=args.force_refresh):
         logger.error("Erreur lors de la collecte des données. Arrêt du traitement.")
         return
     
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Fonctions communes au scraper et au script de mise à jour du tableau de bord pour
+l'interrogation de Sika Finance: limitation du débit des requêtes et analyse des
+pages.
+"""
+
+import time
+import threading
+import lxml.html
+from requests.adapters import HTTPAdapter
+
+def parse_html(response):
+    """
+    Construire l'arbre lxml directement à partir des octets de la réponse.
+
+    Le jeu de caractères annoncé par le serveur est transmis au parseur: on évite
+    ainsi le décodage de response.text (et la détection d'encodage de requests)
+    sans perdre l'encodage déclaré dans l'en-tête HTTP.
+    """
+    parser = None
+    if 'charset=' in response.headers.get('Content-Type', '').lower():
+        parser = lxml.html.HTMLParser(encoding=response.encoding)
+    return lxml.html.fromstring(response.content, parser=parser)
+
+class RateLimiter:
+    """Limiteur de débit (seau à jetons) partagé entre les threads de récupération."""
+    
+    def __init__(self, rate):
+        """
+        Args:
+            rate (float): Nombre maximal de requêtes par seconde, tous threads confondus
+                (strictement positif; peut être inférieur à 1)
+        
+        Raises:
+            ValueError: Si le débit n'est pas strictement positif
+        """
+        if rate <= 0:
+            raise ValueError(f"Le débit doit être strictement positif (reçu: {rate})")
+        self.rate = rate
+        # Le seau contient au moins un jeton, sans quoi un débit inférieur à une
+        # requête par seconde ne permettrait jamais d'en obtenir un
+        self._capacity = max(1.0, rate)
+        self._tokens = 1.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """Bloquer jusqu'à ce qu'un jeton soit disponible."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class ThrottledAdapter(HTTPAdapter):
+    """
+    Adaptateur HTTP qui prélève un jeton du limiteur avant chaque envoi.
+    
+    Monté sur une CachedSession, il n'est appelé que pour les requêtes qui
+    atteignent réellement le serveur (absentes du cache, expirées ou revalidées):
+    les réponses servies depuis le cache ne sont pas ralenties.
+    """
+    
+    def __init__(self, rate_limiter, **kwargs):
+        """
+        Args:
+            rate_limiter (RateLimiter): Limiteur de débit partagé
+            **kwargs: Arguments transmis à HTTPAdapter
+        """
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+    
+    def send(self, request, **kwargs):
+        self.rate_limiter.acquire()
+        return super().send(request, **kwargs)
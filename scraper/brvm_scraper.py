@@ -7,12 +7,17 @@ Script de scraping pour récupérer les données historiques des valeurs mobili
 """
 
 import os
-import requests
+import sys
+from urllib3.util.retry import Retry
+from requests_cache import CachedSession
 import pandas as pd
-from bs4 import BeautifulSoup
+import lxml.etree
 import time
 import json
-from datetime import datetime
+import orjson
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
 import logging
 
 # Configuration du logging
@@ -23,27 +28,147 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BRVM_Scraper")
 
-# Création du dossier data s'il n'existe pas
-if not os.path.exists('data'):
-    os.makedirs('data')
-    logger.info("Dossier 'data' créé")
+# Ajouter le répertoire parent au path pour pouvoir importer les modules du projet
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper._http_common import RateLimiter, ThrottledAdapter, parse_html
+
+# Lignes du premier tableau de classe "table" de la page (équivalent du sélecteur
+# CSS "table.table tbody tr"), expression compilée une seule fois
+TABLE_ROWS_XPATH = lxml.etree.XPath(
+    '(//table[contains(concat(" ", normalize-space(@class), " "), " table ")])[1]//tbody//tr'
+)
+
+# Cache disque de la liste des valeurs cotées
+SYMBOLS_CACHE_PATH = os.path.join('data', '_symbols.json')
+SYMBOLS_CACHE_TTL = timedelta(hours=24)
+
+# Champs de l'API historique de Sika Finance et colonnes correspondantes
+SIKA_COLUMNS = {
+    "date": "Date",
+    "ouverture": "Ouverture",
+    "plus_haut": "Plus_Haut",
+    "plus_bas": "Plus_Bas",
+    "cloture": "Cloture",
+    "variation": "Variation",
+    "volume": "Volume"
+}
+
+def parse_decimal(values):
+    """Convertir une liste de nombres au format français ("12,5") en Series de flottants."""
+    return pd.to_numeric(
+        pd.Series(values, dtype=object).str.replace(',', '.', regex=False),
+        errors='coerce'
+    ).astype('float64')
+
+def to_iso_date(date_str):
+    """Convertir une date DD/MM/YYYY au format YYYY-MM-DD attendu par les API."""
+    return datetime.strptime(date_str, '%d/%m/%Y').strftime('%Y-%m-%d')
 
 class BRVMScraper:
     """Classe pour scraper les données de la BRVM."""
     
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, max_workers=8, requests_per_second=4, cache_expire_after=timedelta(hours=6)):
+        """
+        Args:
+            max_workers (int): Nombre de valeurs scrapées en parallèle
+            requests_per_second (float): Débit maximal de requêtes vers les serveurs
+            cache_expire_after (timedelta): Durée de validité des réponses en cache
+        """
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(requests_per_second)
+        
+        # Session avec cache HTTP sur disque (SQLite): une relance ne retélécharge
+        # que les requêtes expirées. Le corps JSON des POST fait partie de la clé.
+        self.session = CachedSession(
+            'brvm_cache',
+            backend='sqlite',
+            expire_after=cache_expire_after,
+            allowable_methods=['GET', 'POST'],
+            match_headers=False
+        )
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8'
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
         })
         
+        # Pool de connexions persistantes et relances automatiques sur les erreurs
+        # transitoires des serveurs. Le pool est limité à une connexion par thread
+        # et par hôte (pool_block): au plus max_workers poignées de main TLS par
+        # hôte et par exécution, les connexions étant ensuite réutilisées. Le débit
+        # n'est limité qu'à l'envoi effectif: les réponses du cache ne sont pas ralenties.
+        retries = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['GET', 'POST']
+        )
+        adapter = ThrottledAdapter(self.rate_limiter, pool_connections=4, pool_maxsize=max_workers,
+                                   pool_block=True, max_retries=retries)
+        for prefix in ("https://www.brvm.org", "https://www.sikafinance.com"):
+            self.session.mount(prefix, adapter)
+        
         # Liste des indices et valeurs principales
         self.indices = ["BRVM-Composite", "BRVM-30"]
         
+        # Liste des valeurs cotées, récupérée une seule fois par instance
+        self._stocks = None
+        
     def get_all_stocks(self):
-        """Récupérer la liste de toutes les valeurs cotées."""
+        """
+        Récupérer la liste de toutes les valeurs cotées.
+        
+        La liste est mémorisée pour la durée de vie du scraper et enregistrée dans
+        data/_symbols.json: une relance dans les 24 heures n'interroge pas le site.
+        """
+        if self._stocks is not None:
+            return self._stocks
+        
+        stocks = self._load_symbols_cache()
+        if stocks is None:
+            stocks = self._fetch_all_stocks()
+            if stocks:
+                self._save_symbols_cache(stocks)
+        
+        # Une liste vide (échec de la récupération) n'est pas mémorisée
+        if stocks:
+            self._stocks = stocks
+        return stocks
+    
+    def clear_cache(self):
+        """Vider le cache HTTP et la liste des valeurs mémorisée."""
+        self.session.cache.clear()
+        self._stocks = None
+        if os.path.exists(SYMBOLS_CACHE_PATH):
+            os.remove(SYMBOLS_CACHE_PATH)
+    
+    def _load_symbols_cache(self):
+        """Charger la liste des valeurs depuis le cache disque s'il est encore valide."""
+        try:
+            age = time.time() - os.path.getmtime(SYMBOLS_CACHE_PATH)
+            if age > SYMBOLS_CACHE_TTL.total_seconds():
+                return None
+            with open(SYMBOLS_CACHE_PATH, 'r', encoding='utf-8') as f:
+                stocks = json.load(f)
+            logger.info(f"Liste de {len(stocks)} valeurs cotées chargée depuis {SYMBOLS_CACHE_PATH}")
+            return stocks
+        except (OSError, ValueError):
+            return None
+    
+    def _save_symbols_cache(self, stocks):
+        """Enregistrer la liste des valeurs dans le cache disque."""
+        try:
+            os.makedirs(os.path.dirname(SYMBOLS_CACHE_PATH), exist_ok=True)
+            with open(SYMBOLS_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump(stocks, f, ensure_ascii=False)
+        except OSError as e:
+            logger.warning(f"Impossible d'enregistrer la liste des valeurs: {str(e)}")
+    
+    def _fetch_all_stocks(self):
+        """Télécharger la liste de toutes les valeurs cotées depuis le site de la BRVM."""
         try:
             # URL de la page des cours de la BRVM
             url = "https://www.brvm.org/fr/cours-actions/0"
@@ -51,20 +176,16 @@ class BRVMScraper:
             response = self.session.get(url)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            tree = parse_html(response)
             
             # Extraction de la liste des symboles
             stocks = []
-            stock_table = soup.select_one("table.table")
-            
-            if stock_table:
-                rows = stock_table.select("tbody tr")
-                for row in rows:
-                    cols = row.select("td")
-                    if len(cols) >= 2:
-                        symbol = cols[0].text.strip()
-                        name = cols[1].text.strip()
-                        stocks.append({"symbol": symbol, "name": name})
+            for row in TABLE_ROWS_XPATH(tree):
+                cols = row.findall("td")
+                if len(cols) >= 2:
+                    symbol = cols[0].text_content().strip()
+                    name = cols[1].text_content().strip()
+                    stocks.append({"symbol": symbol, "name": name})
             
             logger.info(f"Récupéré {len(stocks)} valeurs cotées")
             return stocks
@@ -73,7 +194,8 @@ class BRVMScraper:
             logger.error(f"Erreur lors de la récupération des valeurs: {str(e)}")
             return []
     
-    def scrape_sika_finance(self, symbol, start_date='01/01/2010', end_date=None):
+    def scrape_sika_finance(self, symbol, start_date='01/01/2010', end_date=None,
+                            start_date_iso=None, end_date_iso=None):
         """
         Scraper les données historiques d'une valeur depuis Sika Finance.
         
@@ -81,6 +203,8 @@ class BRVMScraper:
             symbol (str): Le symbole de la valeur
             start_date (str): Date de début au format DD/MM/YYYY
             end_date (str): Date de fin au format DD/MM/YYYY
+            start_date_iso (str): Date de début déjà convertie au format YYYY-MM-DD (optionnel)
+            end_date_iso (str): Date de fin déjà convertie au format YYYY-MM-DD (optionnel)
         
         Returns:
             pd.DataFrame: DataFrame contenant les données historiques
@@ -94,40 +218,35 @@ class BRVMScraper:
             url = "https://www.sikafinance.com/api/general/GetHistorique"
             
             # SikaFinance attend un format différent pour la date
-            start_date_obj = datetime.strptime(start_date, '%d/%m/%Y')
-            end_date_obj = datetime.strptime(end_date, '%d/%m/%Y')
+            if start_date_iso is None:
+                start_date_iso = to_iso_date(start_date)
+            if end_date_iso is None:
+                end_date_iso = to_iso_date(end_date)
             
             payload = {
                 "ticker": symbol,
-                "dateDebut": start_date_obj.strftime('%Y-%m-%d'),
-                "dateFin": end_date_obj.strftime('%Y-%m-%d')
+                "dateDebut": start_date_iso,
+                "dateFin": end_date_iso
             }
             
             response = self.session.post(url, json=payload)
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             
             if "intraday" in data and len(data["intraday"]) > 0:
-                # Conversion en DataFrame
-                df = pd.DataFrame(data["intraday"])
-                
-                # Renommage des colonnes
-                df = df.rename(columns={
-                    "date": "Date",
-                    "ouverture": "Ouverture",
-                    "plus_haut": "Plus_Haut",
-                    "plus_bas": "Plus_Bas",
-                    "cloture": "Cloture",
-                    "variation": "Variation",
-                    "volume": "Volume"
+                # Conversion en DataFrame colonne par colonne, avec renommage
+                rows = data["intraday"]
+                df = pd.DataFrame({
+                    column: [row.get(key) for row in rows]
+                    for key, column in SIKA_COLUMNS.items()
                 })
                 
-                # Conversion de la date en format datetime
-                df["Date"] = pd.to_datetime(df["Date"])
+                # Conversion de la date (ISO YYYY-MM-DD) avec un format explicite
+                df["Date"] = pd.to_datetime(df["Date"], format='%Y-%m-%d', cache=True)
                 
-                # Tri par date
-                df = df.sort_values("Date")
+                # Tri par date (tri stable, rapide sur des données déjà ordonnées)
+                df = df.sort_values("Date", kind="stable")
                 
                 # Ajout du symbole
                 df["Symbole"] = symbol
@@ -142,7 +261,8 @@ class BRVMScraper:
             logger.error(f"Erreur lors du scraping de {symbol}: {str(e)}")
             return pd.DataFrame()
     
-    def scrape_brvm_official(self, symbol, start_date='01/01/2010', end_date=None):
+    def scrape_brvm_official(self, symbol, start_date='01/01/2010', end_date=None,
+                             start_date_iso=None, end_date_iso=None):
         """
         Scraper les données historiques d'une valeur depuis le site officiel de la BRVM.
         
@@ -150,6 +270,8 @@ class BRVMScraper:
             symbol (str): Le symbole de la valeur
             start_date (str): Date de début au format DD/MM/YYYY
             end_date (str): Date de fin au format DD/MM/YYYY
+            start_date_iso (str): Date de début déjà convertie au format YYYY-MM-DD (optionnel)
+            end_date_iso (str): Date de fin déjà convertie au format YYYY-MM-DD (optionnel)
         
         Returns:
             pd.DataFrame: DataFrame contenant les données historiques
@@ -161,8 +283,10 @@ class BRVMScraper:
         
         try:
             # Conversion des dates
-            start_date_obj = datetime.strptime(start_date, '%d/%m/%Y')
-            end_date_obj = datetime.strptime(end_date, '%d/%m/%Y')
+            if start_date_iso is None:
+                start_date_iso = to_iso_date(start_date)
+            if end_date_iso is None:
+                end_date_iso = to_iso_date(end_date)
             
             # URL pour les données historiques de la BRVM
             # Noter que cette implémentation est indicative et devra être adaptée
@@ -170,44 +294,43 @@ class BRVMScraper:
             url = f"https://www.brvm.org/fr/historique/{symbol}"
             
             params = {
-                "start": start_date_obj.strftime('%Y-%m-%d'),
-                "end": end_date_obj.strftime('%Y-%m-%d')
+                "start": start_date_iso,
+                "end": end_date_iso
             }
             
             response = self.session.get(url, params=params)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            tree = parse_html(response)
             
             # Extraction des données du tableau
-            data = []
-            table = soup.select_one("table.table")
-            
-            if table:
-                rows = table.select("tbody tr")
-                for row in rows:
-                    cols = row.select("td")
-                    if len(cols) >= 6:
-                        date_str = cols[0].text.strip()
-                        opening = cols[1].text.strip().replace(',', '.')
-                        high = cols[2].text.strip().replace(',', '.')
-                        low = cols[3].text.strip().replace(',', '.')
-                        closing = cols[4].text.strip().replace(',', '.')
-                        volume = cols[5].text.strip().replace(' ', '')
-                        
-                        data.append({
-                            "Date": datetime.strptime(date_str, '%d/%m/%Y'),
-                            "Ouverture": float(opening) if opening else None,
-                            "Plus_Haut": float(high) if high else None,
-                            "Plus_Bas": float(low) if low else None,
-                            "Cloture": float(closing) if closing else None,
-                            "Volume": int(volume) if volume else 0,
-                            "Symbole": symbol
-                        })
+            # Les cellules sont collectées colonne par colonne puis converties
+            # en une seule passe vectorisée par pandas
+            dates, opens, highs, lows, closes, volumes = [], [], [], [], [], []
+            for row in TABLE_ROWS_XPATH(tree):
+                cols = [col.text_content().strip() for col in row.findall("td")]
+                if len(cols) >= 6:
+                    dates.append(cols[0])
+                    opens.append(cols[1])
+                    highs.append(cols[2])
+                    lows.append(cols[3])
+                    closes.append(cols[4])
+                    volumes.append(cols[5])
             
-            df = pd.DataFrame(data)
+            df = pd.DataFrame({
+                "Date": pd.to_datetime(pd.Series(dates, dtype=object), format='%d/%m/%Y', cache=True),
+                "Ouverture": parse_decimal(opens),
+                "Plus_Haut": parse_decimal(highs),
+                "Plus_Bas": parse_decimal(lows),
+                "Cloture": parse_decimal(closes),
+                "Volume": pd.to_numeric(
+                    pd.Series(volumes, dtype=object).str.replace(' ', '', regex=False),
+                    errors='coerce'
+                ).fillna(0).astype('int64'),
+                "Symbole": symbol
+            })
             if not df.empty:
-                df = df.sort_values("Date")
+                df = df.sort_values("Date", kind="stable")
                 logger.info(f"Récupéré {len(df)} lignes de données officielles BRVM pour {symbol}")
             else:
                 logger.warning(f"Aucune donnée officielle disponible pour {symbol}")
@@ -218,54 +341,162 @@ class BRVMScraper:
             logger.error(f"Erreur lors du scraping officiel BRVM pour {symbol}: {str(e)}")
             return pd.DataFrame()
     
-    def get_all_historical_data(self, use_sika=True, use_brvm=True):
+    def _fetch_symbol(self, symbol, use_sika, use_brvm, dates):
+        """Récupérer les données d'une valeur en essayant les sources dans l'ordre."""
+        df_combined = pd.DataFrame()
+        
+        # Tentative avec Sika Finance
+        if use_sika:
+            df_sika = self.scrape_sika_finance(symbol, **dates)
+            if not df_sika.empty:
+                df_combined = df_sika
+        
+        # Tentative avec le site officiel BRVM
+        if use_brvm and df_combined.empty:
+            df_brvm = self.scrape_brvm_official(symbol, **dates)
+            if not df_brvm.empty:
+                df_combined = df_brvm
+        
+        return df_combined
+    
+    def _update_symbol(self, symbol, output_path, use_sika, use_brvm, dates, incremental):
+        """
+        Mettre à jour l'historique d'une valeur.
+        
+        En mode incrémental, seules les dates postérieures à la dernière date du
+        fichier existant sont demandées, puis ajoutées à l'historique déjà présent.
+        
+        Returns:
+            tuple: (DataFrame de l'historique complet, True si de nouvelles données ont été récupérées)
+        """
+        existing = None
+        if incremental and os.path.exists(output_path):
+            try:
+                existing = pd.read_csv(output_path, parse_dates=['Date'])
+            except Exception as e:
+                logger.warning(f"Historique existant illisible pour {symbol}, rechargement complet: {str(e)}")
+        
+        if existing is not None and not existing.empty:
+            last_date = existing['Date'].max()
+            end_date = datetime.strptime(dates["end_date"], '%d/%m/%Y')
+            if last_date >= end_date:
+                logger.info(f"Historique de {symbol} déjà à jour ({last_date:%d/%m/%Y})")
+                return existing, False
+            
+            next_date = last_date + pd.Timedelta(days=1)
+            dates = dict(
+                dates,
+                start_date=next_date.strftime('%d/%m/%Y'),
+                start_date_iso=next_date.strftime('%Y-%m-%d')
+            )
+        
+        df_new = self._fetch_symbol(symbol, use_sika, use_brvm, dates)
+        
+        if existing is None or existing.empty:
+            return df_new, not df_new.empty
+        if df_new.empty:
+            return existing, False
+        
+        df_combined = pd.concat([existing, df_new], ignore_index=True)
+        df_combined = df_combined.drop_duplicates(subset='Date', keep='last').sort_values("Date", kind="stable")
+        return df_combined, True
+    
+    def get_all_historical_data(self, use_sika=True, use_brvm=True, start_date='01/01/2010', end_date=None,
+                                incremental=True):
         """
         Récupérer les données historiques pour toutes les valeurs.
         
+        Les valeurs sont scrapées en parallèle par un pool de threads; le débit
+        global vers les serveurs reste borné par le limiteur de requêtes.
+        
         Args:
             use_sika (bool): Utiliser Sika Finance comme source
             use_brvm (bool): Utiliser le site officiel BRVM comme source
+            start_date (str): Date de début au format DD/MM/YYYY
+            end_date (str): Date de fin au format DD/MM/YYYY
+            incremental (bool): Ne récupérer que les dates absentes des fichiers existants
         """
+        # Création du dossier data s'il n'existe pas
+        if not os.path.exists('data'):
+            os.makedirs('data')
+            logger.info("Dossier 'data' créé")
+        
+        if end_date is None:
+            end_date = datetime.now().strftime('%d/%m/%Y')
+        
+        # Les dates sont identiques pour toutes les valeurs: conversion unique
+        dates = {
+            "start_date": start_date,
+            "end_date": end_date,
+            "start_date_iso": to_iso_date(start_date),
+            "end_date_iso": to_iso_date(end_date)
+        }
+        
         stocks = self.get_all_stocks()
         
         # Ajouter les indices
         all_symbols = stocks + [{"symbol": idx, "name": idx} for idx in self.indices]
         
-        for stock in all_symbols:
-            symbol = stock["symbol"]
-            
-            df_combined = pd.DataFrame()
-            
-            # Tentative avec Sika Finance
-            if use_sika:
-                df_sika = self.scrape_sika_finance(symbol)
-                if not df_sika.empty:
-                    df_combined = df_sika
-            
-            # Tentative avec le site officiel BRVM
-            if use_brvm and df_combined.empty:
-                df_brvm = self.scrape_brvm_official(symbol)
-                if not df_brvm.empty:
-                    df_combined = df_brvm
-            
-            # Sauvegarder les données si on a récupéré quelque chose
-            if not df_combined.empty:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {}
+            for stock in all_symbols:
+                symbol = stock["symbol"]
                 output_path = f"data/{symbol.replace('/', '-')}_historical.csv"
-                df_combined.to_csv(output_path, index=False)
-                logger.info(f"Données sauvegardées pour {symbol} dans {output_path}")
-            else:
-                logger.warning(f"Aucune donnée n'a pu être récupérée pour {symbol}")
+                future = executor.submit(
+                    self._update_symbol, symbol, output_path, use_sika, use_brvm, dates, incremental
+                )
+                futures[future] = (symbol, output_path)
             
-            # Respecter la politesse avec les serveurs
-            time.sleep(2)
+            # Les fichiers sont écrits depuis le thread principal, au fil des résultats
+            for future in as_completed(futures):
+                symbol, output_path = futures[future]
+                
+                try:
+                    df_combined, updated = future.result()
+                except Exception as e:
+                    logger.error(f"Erreur lors de la récupération des données pour {symbol}: {str(e)}")
+                    continue
+                
+                # Sauvegarder les données si on a récupéré quelque chose
+                if updated:
+                    df_combined.to_csv(output_path, index=False)
+                    logger.info(f"Données sauvegardées pour {symbol} dans {output_path}")
+                elif df_combined.empty:
+                    logger.warning(f"Aucune donnée n'a pu être récupérée pour {symbol}")
 
 
+def positive_number(convert):
+    """Type argparse: nombre converti par `convert` et strictement positif."""
+    def parse(value):
+        try:
+            number = convert(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"nombre invalide: {value!r}")
+        if not number > 0:  # rejette aussi NaN
+            raise argparse.ArgumentTypeError(f"doit être strictement positif (reçu: {value})")
+        return number
+    return parse
+
 def main():
     """Point d'entrée principal."""
+    parser = argparse.ArgumentParser(description="Scraping des données historiques de la BRVM")
+    parser.add_argument("--force-refresh", action="store_true",
+                        help="Vider les caches (HTTP et liste des valeurs) avant le scraping")
+    parser.add_argument("--full", action="store_true",
+                        help="Retélécharger tout l'historique au lieu des seules dates manquantes")
+    parser.add_argument("--workers", type=positive_number(int), default=8,
+                        help="Nombre de valeurs scrapées en parallèle (défaut: 8)")
+    parser.add_argument("--rate", type=positive_number(float), default=4,
+                        help="Nombre maximal de requêtes par seconde (défaut: 4)")
+    args = parser.parse_args()
+    
     logger.info("Début du scraping des données BRVM")
     
-    scraper = BRVMScraper()
-    scraper.get_all_historical_data()
+    scraper = BRVMScraper(max_workers=args.workers, requests_per_second=args.rate)
+    if args.force_refresh:
+        scraper.clear_cache()
+        logger.info("Cache vidé")
+    scraper.get_all_historical_data(incremental=not args.full)
     
     logger.info("Scraping terminé")
 
@@ -0,0 +1,400 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Fonctions communes au tableau de bord et aux scripts d'export Excel et de rapport
+PDF: chargement des historiques, calcul des performances et classification
+sectorielle.
+"""
+
+import os
+import glob
+import json
+import pandas as pd
+import numpy as np
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+from numba import njit, prange
+import pyarrow as pa
+from pyarrow import csv as pacsv
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("BRVM_Common")
+
+# Colonnes lues dans les fichiers d'historique et leurs types, appliqués
+# directement par le lecteur CSV de PyArrow
+CSV_COLUMNS = ['Date', 'Ouverture', 'Plus_Haut', 'Plus_Bas', 'Cloture', 'Volume']
+CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    column_types={
+        'Date': pa.timestamp('ns'),
+        'Ouverture': pa.float64(),
+        'Plus_Haut': pa.float64(),
+        'Plus_Bas': pa.float64(),
+        'Cloture': pa.float64(),
+        'Volume': pa.float64()
+    },
+    include_columns=CSV_COLUMNS,
+    include_missing_columns=True
+)
+
+# Cache Parquet des historiques déjà lus, relatif au répertoire des données et
+# partagé par le tableau de bord et les rapports
+CACHE_DIR = '.cache'
+CACHE_INDEX = 'index.json'
+
+def ensure_directory(directory):
+    """S'assurer que le répertoire existe, le créer si nécessaire."""
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+        logger.info(f"Répertoire '{directory}' créé.")
+
+def load_csv(file_path):
+    """Lire un fichier d'historique avec le lecteur CSV multi-thread de PyArrow."""
+    table = pacsv.read_csv(file_path, convert_options=CSV_CONVERT_OPTIONS)
+    return table.to_pandas()
+
+def file_stamp(file_path):
+    """Empreinte (date de modification, taille) d'un fichier source."""
+    stat = os.stat(file_path)
+    return {'mtime': stat.st_mtime, 'size': stat.st_size}
+
+def load_cache_index(cache_dir):
+    """Charger l'index du cache Parquet (empreintes des CSV sources)."""
+    index_path = os.path.join(cache_dir, CACHE_INDEX)
+    if not os.path.exists(index_path):
+        return {}
+    
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.error(f"Erreur lors de la lecture de l'index du cache: {str(e)}")
+        return {}
+
+def save_cache_index(cache_dir, index):
+    """Enregistrer l'index du cache Parquet."""
+    try:
+        with open(os.path.join(cache_dir, CACHE_INDEX), 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+    except Exception as e:
+        logger.error(f"Erreur lors de l'écriture de l'index du cache: {str(e)}")
+
+def load_file(file_path, cache_dir, cache_index):
+    """
+    Charger un fichier d'historique, en passant par le cache Parquet si possible.
+    
+    Returns:
+        tuple: (symbole, DataFrame, empreinte du CSV) ou None en cas d'erreur
+    """
+    file_name = os.path.basename(file_path)
+    symbol = file_name.split('_')[0]
+    cache_path = os.path.join(cache_dir, f"{symbol}.parquet")
+    
+    try:
+        stamp = file_stamp(file_path)
+        
+        # Le cache n'est valable que si le CSV source n'a pas changé depuis
+        if cache_index.get(file_name) == stamp and os.path.exists(cache_path):
+            df = pd.read_parquet(cache_path)
+            logger.info(f"Chargé {len(df)} lignes pour {symbol} (cache)")
+            return symbol, df, stamp
+        
+        # Les types des colonnes sont appliqués par le lecteur PyArrow
+        df = load_csv(file_path)
+        
+        # Trier par date (tri stable, rapide sur des fichiers déjà ordonnés)
+        df = df.sort_values('Date', kind='mergesort').reset_index(drop=True)
+        
+        df.to_parquet(cache_path, compression='zstd', index=False)
+        
+        logger.info(f"Chargé {len(df)} lignes pour {symbol}")
+        return symbol, df, stamp
+    except Exception as e:
+        logger.error(f"Erreur lors du chargement de {file_path}: {str(e)}")
+        return None
+
+def load_data(data_dir="../data"):
+    """
+    Charger toutes les données des fichiers CSV.
+    
+    Les DataFrames sont mis en cache au format Parquet dans data/.cache; un CSV
+    inchangé (même date de modification et même taille) n'est pas relu.
+    """
+    logger.info(f"Chargement des données depuis {data_dir}...")
+    
+    all_files = glob.glob(os.path.join(data_dir, "*.csv"))
+    
+    if not all_files:
+        logger.error(f"Aucun fichier CSV trouvé dans {data_dir}")
+        return {}
+    
+    cache_dir = os.path.join(data_dir, CACHE_DIR)
+    ensure_directory(cache_dir)
+    cache_index = load_cache_index(cache_dir)
+    
+    # Les fichiers sont indépendants: lecture en parallèle (le lecteur PyArrow
+    # libère le GIL)
+    max_workers = min(16, (os.cpu_count() or 1) * 2, len(all_files))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(
+            lambda file_path: load_file(file_path, cache_dir, cache_index),
+            all_files
+        ))
+    
+    data_frames = {}
+    new_index = {}
+    for file_path, result in zip(all_files, results):
+        if result is None:
+            continue
+        symbol, df, stamp = result
+        data_frames[symbol] = df
+        new_index[os.path.basename(file_path)] = stamp
+    
+    if new_index != cache_index:
+        save_cache_index(cache_dir, new_index)
+    
+    return data_frames
+
+@njit(cache=True, nogil=True, parallel=True, error_model='numpy')
+def perf_kernel(close, offsets):
+    """
+    Calculer en une seule passe les cours extrêmes et les statistiques de
+    rendement de chaque valeur.
+    
+    Les cours de clôture de toutes les valeurs sont concaténés dans `close`; la
+    valeur g occupe close[offsets[g]:offsets[g + 1]]. Pour chaque valeur, la boucle
+    calcule les rendements journaliers, leur écart-type (algorithme de Welford),
+    leurs extrêmes et le drawdown maximum par rapport au plus haut cours atteint
+    (à partir du deuxième cours, comme le cumul des rendements), sans tableau
+    intermédiaire. Les valeurs manquantes sont ignorées.
+    
+    Returns:
+        tuple: (premier cours, dernier cours, volatilité journalière,
+                rendement max, rendement min, drawdown max)
+    """
+    n_groups = len(offsets) - 1
+    initial_price = np.full(n_groups, np.nan)
+    final_price = np.full(n_groups, np.nan)
+    volatility = np.full(n_groups, np.nan)
+    max_return = np.full(n_groups, np.nan)
+    min_return = np.full(n_groups, np.nan)
+    max_drawdown = np.full(n_groups, np.nan)
+    
+    # Les valeurs sont indépendantes: elles sont réparties entre les cœurs
+    for g in prange(n_groups):
+        # Premier et dernier cours renseignés
+        for i in range(offsets[g], offsets[g + 1]):
+            if not np.isnan(close[i]):
+                initial_price[g] = close[i]
+                break
+        for i in range(offsets[g + 1] - 1, offsets[g] - 1, -1):
+            if not np.isnan(close[i]):
+                final_price[g] = close[i]
+                break
+        
+        count = 0
+        mean = 0.0
+        m2 = 0.0
+        max_r = -np.inf
+        min_r = np.inf
+        peak = -np.inf
+        has_peak = False
+        min_dd = np.inf
+        has_dd = False
+        
+        for i in range(offsets[g] + 1, offsets[g + 1]):
+            # Drawdown par rapport au plus haut cours atteint
+            price = close[i]
+            if not np.isnan(price):
+                if not has_peak or price > peak:
+                    peak = price
+                    has_peak = True
+                dd = price / peak - 1
+                if not np.isnan(dd) and dd < min_dd:
+                    min_dd = dd
+                    has_dd = True
+            
+            r = close[i] / close[i - 1] - 1
+            if np.isnan(r):
+                continue
+            
+            # Écart-type et extrêmes des rendements journaliers
+            count += 1
+            delta = r - mean
+            mean += delta / count
+            m2 += delta * (r - mean)
+            if r > max_r:
+                max_r = r
+            if r < min_r:
+                min_r = r
+        
+        if count >= 2:
+            volatility[g] = np.sqrt(m2 / (count - 1))
+        if count >= 1:
+            max_return[g] = max_r
+            min_return[g] = min_r
+        if has_dd:
+            max_drawdown[g] = min_dd
+    
+    return initial_price, final_price, volatility, max_return, min_return, max_drawdown
+
+def calculate_performances(data_frames, risk_free_rate=0.03):
+    """
+    Calculer les indicateurs de performance de toutes les valeurs.
+    
+    Les cours de toutes les valeurs sont concaténés en tableaux NumPy; les
+    statistiques de rendement sont calculées par le noyau compilé perf_kernel, au
+    lieu d'une série d'appels pandas par valeur. Les cours initial et final sont
+    le premier et le dernier cours renseignés. Les DataFrames fournis ne sont pas
+    modifiés.
+    
+    Args:
+        data_frames (dict): Historiques par symbole
+        risk_free_rate (float): Taux sans risque utilisé pour le ratio de Sharpe
+    
+    Returns:
+        pd.DataFrame: Indicateurs de performance, indexés par symbole; la colonne
+            'is_index' distingue les indices BRVM des valeurs et la colonne
+            'Secteur' (catégorielle) donne le secteur de chaque symbole
+    """
+    # Les valeurs avec moins de deux cotations n'ont pas de rendement
+    frames = {symbol: df for symbol, df in data_frames.items() if len(df) >= 2}
+    if not frames:
+        return pd.DataFrame()
+    
+    # Cours concaténés, la valeur g occupant close[offsets[g]:offsets[g + 1]]
+    offsets = np.zeros(len(frames) + 1, dtype=np.int64)
+    np.cumsum([len(df) for df in frames.values()], out=offsets[1:])
+    close = np.concatenate([
+        df['Cloture'].to_numpy(dtype=np.float64) for df in frames.values()
+    ])
+    (
+        initial_price, final_price, volatility,
+        max_daily_return, min_daily_return, max_drawdown
+    ) = perf_kernel(close, offsets)
+    
+    # Dates de début et de fin (fmin/fmax ignorent les dates manquantes)
+    dates = np.concatenate([
+        df['Date'].to_numpy(dtype='datetime64[ns]') for df in frames.values()
+    ])
+    start_date = pd.DatetimeIndex(np.fmin.reduceat(dates, offsets[:-1]))
+    end_date = pd.DatetimeIndex(np.fmax.reduceat(dates, offsets[:-1]))
+    
+    # Durée de cotation
+    duration_days = (end_date - start_date).days.to_numpy()
+    duration_years = duration_days / 365.25
+    
+    # Performance globale et annualisée
+    price_ratio = final_price / initial_price
+    total_return = (price_ratio - 1) * 100
+    with np.errstate(divide='ignore', invalid='ignore'):
+        annual_return = np.where(
+            duration_years > 0,
+            (price_ratio ** (1 / duration_years) - 1) * 100,
+            0
+        )
+    
+    # Volatilité (écart-type des rendements journaliers annualisé, en %)
+    volatility = volatility * np.sqrt(252) * 100
+    
+    # Ratio de Sharpe
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratio = np.where(
+            volatility > 0,
+            (annual_return / 100 - risk_free_rate) / (volatility / 100),
+            0
+        )
+    
+    symbols = pd.Index(list(frames), name='Symbole')
+    is_index = is_brvm_index(symbols)
+    
+    return pd.DataFrame({
+        'is_index': is_index,
+        'Secteur': pd.Categorical(get_sectors(symbols, is_index)),
+        'start_date': start_date,
+        'end_date': end_date,
+        'duration_days': duration_days,
+        'duration_years': duration_years,
+        'initial_price': initial_price,
+        'final_price': final_price,
+        'total_return': total_return,
+        'annual_return': annual_return,
+        'volatility': volatility,
+        'sharpe_ratio': sharpe_ratio,
+        'max_daily_return': max_daily_return * 100,
+        'min_daily_return': min_daily_return * 100,
+        'max_drawdown': max_drawdown * 100
+    }, index=symbols)
+
+def calculate_sector_performances(perf_df):
+    """
+    Calculer les performances moyennes par secteur.
+    
+    Args:
+        perf_df (pd.DataFrame): Performances par symbole (voir calculate_performances)
+        
+    Returns:
+        pd.DataFrame: Moyennes par secteur, triées par performance annualisée décroissante
+    """
+    sector_perf = perf_df.groupby('Secteur', observed=True).agg({
+        'total_return': 'mean',
+        'annual_return': 'mean',
+        'volatility': 'mean',
+        'sharpe_ratio': 'mean',
+        'max_drawdown': 'mean'
+    }).round(2)
+    
+    # Trier par performance annualisée
+    return sector_perf.sort_values('annual_return', ascending=False)
+
+def is_brvm_index(symbols):
+    """Masque booléen des indices BRVM (symboles commençant par 'BRVM')."""
+    return np.char.startswith(np.asarray(symbols, dtype=str), 'BRVM')
+
+@lru_cache(maxsize=1)
+def get_sector_classification():
+    """
+    Obtenir la classification des secteurs pour les valeurs.
+    
+    La table est construite une seule fois puis mise en cache; elle est renvoyée en
+    lecture seule pour que le cache partagé ne puisse pas être modifié.
+    """
+    sectors = {
+        'Banque': ['SGBCI', 'BOA', 'ECOBANK', 'SIB', 'NSIA', 'BICI', 'BDM', 'CORIS'],
+        'Agro-industrie': ['SOGB', 'SAPH', 'PALC', 'SIFCA', 'SICOR', 'SUCRIVOIRE'],
+        'Distribution': ['CFAO', 'BERNABE', 'VIVO', 'TOTAL'],
+        'Services publics': ['SODECI', 'CIE', 'SONATEL', 'ONATEL'],
+        'Industrie': ['NESTLE', 'SOLIBRA', 'SMB', 'UNIWAX', 'FILTISAC', 'AIR'],
+        'Transport': ['BOLLORE', 'MOVIS', 'SETAO']
+    }
+    
+    # Créer une table de correspondance symbole -> secteur
+    symbol_to_sector = {}
+    for sector, symbols in sectors.items():
+        for symbol in symbols:
+            symbol_to_sector[symbol] = sector
+    
+    return MappingProxyType(symbol_to_sector)
+
+def get_sectors(symbols, is_index=None):
+    """
+    Associer un secteur à chaque symbole.
+    
+    Les symboles absents de la classification sont rattachés à 'Indice' s'ils
+    commencent par 'BRVM', à 'Autres' sinon.
+    
+    Args:
+        symbols (pd.Index): Symboles
+        is_index (np.ndarray, optional): Masque des indices, s'il est déjà calculé
+            (colonne 'is_index' des performances)
+        
+    Returns:
+        pd.Series: Secteur de chaque symbole, indexé par symbole
+    """
+    symbols = pd.Index(symbols)
+    if is_index is None:
+        is_index = is_brvm_index(symbols)
+    sectors = symbols.to_series().map(get_sector_classification())
+    default = np.where(is_index, 'Indice', 'Autres')
+    return sectors.where(sectors.notna(), default)
@@ -7,15 +7,17 @@ Script pour générer un tableau de bord HTML interactif des analyses de la BRVM
 
 import os
 import sys
-import glob
 import pandas as pd
 import numpy as np
 import logging
+from html import escape
 from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+from plotly.offline import get_plotlyjs_version
 import jinja2
+import zstandard as zstd
 
 # Ajouter le répertoire parent au path pour pouvoir importer les modules du projet
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -28,123 +30,33 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BRVM_Dashboard")
 
-def ensure_directory(directory):
-    """S'assurer que le répertoire existe, le créer si nécessaire."""
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-        logger.info(f"Répertoire '{directory}' créé.")
+from _brvm_common import (
+    ensure_directory,
+    load_data,
+    calculate_performances,
+    calculate_sector_performances
+)
 
-def load_data(data_dir="../data"):
-    """Charger toutes les données des fichiers CSV."""
-    logger.info(f"Chargement des données depuis {data_dir}...")
-    
-    all_files = glob.glob(os.path.join(data_dir, "*.csv"))
-    
-    if not all_files:
-        logger.error(f"Aucun fichier CSV trouvé dans {data_dir}")
-        return {}
-    
-    data_frames = {}
-    
-    for file_path in all_files:
-        file_name = os.path.basename(file_path)
-        symbol = file_name.split('_')[0]
-        
-        try:
-            df = pd.read_csv(file_path)
-            
-            # Convertir la date en format datetime
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-            # S'assurer que les colonnes numériques le sont bien
-            for col in ['Ouverture', 'Plus_Haut', 'Plus_Bas', 'Cloture', 'Volume']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Trier par date
-            df = df.sort_values('Date')
-            
-            data_frames[symbol] = df
-            logger.info(f"Chargé {len(df)} lignes pour {symbol}")
-        except Exception as e:
-            logger.error(f"Erreur lors du chargement de {file_path}: {str(e)}")
-    
-    return data_frames
+# Copy-on-Write: les sélections et assign() ne copient les colonnes qu'en cas de
+# modification (toujours actif à partir de pandas 3.0, où l'option est obsolète)
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+# Plotly.js est chargé une seule fois dans l'en-tête de la page; les graphiques
+# sont exportés sans le script (include_plotlyjs=False)
+PLOTLY_JS_URL = f"https://cdn.plot.ly/plotly-{get_plotlyjs_version()}.min.js"
 
-def calculate_performance(df):
-    """Calculer les indicateurs de performance pour une valeur."""
-    if df.empty or len(df) < 2:
-        return {}
-    
-    # Calculer les rendements journaliers
-    df['Rendement'] = df['Cloture'].pct_change()
-    
-    # Dates de début et de fin
-    start_date = df['Date'].min()
-    end_date = df['Date'].max()
-    duration_days = (end_date - start_date).days
-    duration_years = duration_days / 365.25
-    
-    # Prix initial et final
-    initial_price = df.iloc[0]['Cloture']
-    final_price = df.iloc[-1]['Cloture']
-    
-    # Performance globale
-    total_return = (final_price / initial_price - 1) * 100
-    
-    # Performance annualisée
-    annual_return = (((final_price / initial_price) ** (1 / duration_years)) - 1) * 100 if duration_years > 0 else 0
-    
-    # Volatilité (écart-type des rendements journaliers annualisé)
-    volatility = df['Rendement'].std() * np.sqrt(252) * 100  # Annualisé en %
-    
-    # Ratio de Sharpe (en supposant un taux sans risque de 3%)
-    risk_free_rate = 0.03
-    sharpe_ratio = (annual_return / 100 - risk_free_rate) / (volatility / 100) if volatility > 0 else 0
-    
-    # Rendement max et min
-    max_daily_return = df['Rendement'].max() * 100
-    min_daily_return = df['Rendement'].min() * 100
-    
-    # Drawdown maximum
-    df['Cumul'] = (1 + df['Rendement']).cumprod()
-    df['Drawdown'] = df['Cumul'] / df['Cumul'].cummax() - 1
-    max_drawdown = df['Drawdown'].min() * 100
-    
-    return {
-        'start_date': start_date,
-        'end_date': end_date,
-        'duration_days': duration_days,
-        'duration_years': duration_years,
-        'initial_price': initial_price,
-        'final_price': final_price,
-        'total_return': total_return,
-        'annual_return': annual_return,
-        'volatility': volatility,
-        'sharpe_ratio': sharpe_ratio,
-        'max_daily_return': max_daily_return,
-        'min_daily_return': min_daily_return,
-        'max_drawdown': max_drawdown
-    }
+# Mises en page communes des graphiques (Plotly copie ces valeurs, elles ne sont
+# pas modifiées par update_layout)
+CHART_MARGIN = dict(l=50, r=50, b=50, t=100, pad=4)
+BAR_CHART_MARGIN = dict(l=50, r=50, b=100, t=100, pad=4)
+TOP_LEGEND = dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
 
-def get_sector_classification():
-    """Obtenir la classification des secteurs pour les valeurs."""
-    sectors = {
-        'Banque': ['SGBCI', 'BOA', 'ECOBANK', 'SIB', 'NSIA', 'BICI', 'BDM', 'CORIS'],
-        'Agro-industrie': ['SOGB', 'SAPH', 'PALC', 'SIFCA', 'SICOR', 'SUCRIVOIRE'],
-        'Distribution': ['CFAO', 'BERNABE', 'VIVO', 'TOTAL'],
-        'Services publics': ['SODECI', 'CIE', 'SONATEL', 'ONATEL'],
-        'Industrie': ['NESTLE', 'SOLIBRA', 'SMB', 'UNIWAX', 'FILTISAC', 'AIR'],
-        'Transport': ['BOLLORE', 'MOVIS', 'SETAO']
-    }
-    
-    # Créer une table de correspondance symbole -> secteur
-    symbol_to_sector = {}
-    for sector, symbols in sectors.items():
-        for symbol in symbols:
-            symbol_to_sector[symbol] = sector
-    
-    return symbol_to_sector
+# Taille du tampon d'écriture de la page HTML
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Nombre maximal de points tracés pour l'évolution de l'indice (~2 × largeur du graphique)
+EVOLUTION_MAX_POINTS = 2000
 
 def create_performance_chart(perf_df):
     """Créer un graphique des performances totales des 15 meilleures valeurs."""
@@ -152,83 +64,144 @@ def create_performance_chart(perf_df):
     top_perf = perf_df.sort_values('total_return', ascending=False).head(15)
     
     # Créer le graphique
-    fig = px.bar(
-        top_perf, 
-        x=top_perf.index, 
-        y='total_return',
-        title='Performance totale des 15 meilleures valeurs (%)',
-        labels={'x': 'Valeur', 'total_return': 'Performance totale (%)'},
-        color='total_return',
-        color_continuous_scale=px.colors.sequential.Blues
-    )
+    fig = go.Figure(go.Bar(
+        x=top_perf.index,
+        y=top_perf['total_return'],
+        marker=dict(
+            color=top_perf['total_return'],
+            colorscale='Blues',
+            colorbar=dict(title='Performance totale (%)')
+        ),
+        hovertemplate='Valeur=%{x}<br>Performance totale (%)=%{y}<extra></extra>'
+    ))
     
     # Mise en page
     fig.update_layout(
+        title='Performance totale des 15 meilleures valeurs (%)',
+        xaxis_title='Valeur',
+        yaxis_title='Performance totale (%)',
         xaxis_tickangle=-45,
         autosize=True,
-        margin=dict(l=50, r=50, b=100, t=100, pad=4)
+        margin=BAR_CHART_MARGIN
     )
     
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False, div_id='performance-chart')
 
 def create_sector_chart(perf_df):
-    """Créer un graphique des performances moyennes par secteur."""
-    # Obtenir classification sectorielle
-    symbol_to_sector = get_sector_classification()
-    perf_df['Secteur'] = perf_df.index.map(
-        lambda x: symbol_to_sector.get(x, 'Indice' if x.startswith('BRVM') else 'Autres')
-    )
-    
-    # Analyser les performances par secteur
-    sector_perf = perf_df.groupby('Secteur').agg({
-        'total_return': 'mean',
-        'annual_return': 'mean',
-        'volatility': 'mean',
-        'sharpe_ratio': 'mean'
-    }).round(2)
-    
-    # Trier par performance annualisée
-    sector_perf = sector_perf.sort_values('annual_return', ascending=False)
+    """Créer un graphique des performances moyennes par secteur (colonne 'Secteur' requise)."""
+    # Analyser les performances par secteur, triées par performance annualisée
+    sector_perf = calculate_sector_performances(perf_df)
     
     # Créer le graphique
-    fig = px.bar(
-        sector_perf, 
-        x=sector_perf.index, 
-        y='annual_return',
-        title='Performance annualisée moyenne par secteur (%)',
-        labels={'x': 'Secteur', 'annual_return': 'Performance annualisée moyenne (%)'},
-        color='annual_return',
-        color_continuous_scale=px.colors.sequential.Greens
-    )
+    fig = go.Figure(go.Bar(
+        x=sector_perf.index,
+        y=sector_perf['annual_return'],
+        marker=dict(
+            color=sector_perf['annual_return'],
+            colorscale='Greens',
+            colorbar=dict(title='Performance annualisée moyenne (%)')
+        ),
+        hovertemplate='Secteur=%{x}<br>Performance annualisée moyenne (%)=%{y}<extra></extra>'
+    ))
     
     # Mise en page
     fig.update_layout(
+        title='Performance annualisée moyenne par secteur (%)',
+        xaxis_title='Secteur',
+        yaxis_title='Performance annualisée moyenne (%)',
         xaxis_tickangle=-45,
         autosize=True,
-        margin=dict(l=50, r=50, b=100, t=100, pad=4)
+        margin=BAR_CHART_MARGIN
     )
     
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False, div_id='sector-chart')
+
+def lttb_indices(x, y, n_out):
+    """
+    Sélectionner les points à conserver par l'algorithme LTTB
+    (Largest-Triangle-Three-Buckets).
+    
+    Le premier et le dernier point sont conservés; les autres sont répartis en
+    n_out - 2 groupes, dans lesquels on garde le point formant le plus grand
+    triangle avec le point précédemment retenu et la moyenne du groupe suivant.
+    
+    Args:
+        x (np.ndarray): Abscisses croissantes (numériques)
+        y (np.ndarray): Ordonnées, sans valeurs manquantes
+        n_out (int): Nombre de points souhaité
+    
+    Returns:
+        np.ndarray: Indices des points retenus, dans l'ordre
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        
+        # Moyenne du groupe suivant (le dernier point pour le dernier groupe)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    
+    return indices
+
+def downsample_series(dates, values, n_out=EVOLUTION_MAX_POINTS):
+    """Réduire une série temporelle à n_out points par LTTB, en ignorant les valeurs manquantes."""
+    mask = values.notna().to_numpy()
+    dates = dates[mask]
+    values = values[mask]
+    
+    x = dates.to_numpy().astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    indices = lttb_indices(x, values.to_numpy(dtype=np.float64), n_out)
+    
+    return dates.iloc[indices], values.iloc[indices]
 
 def create_brvm_evolution_chart(data_frames):
-    """Créer un graphique de l'évolution de l'indice BRVM-Composite."""
+    """
+    Créer un graphique de l'évolution de l'indice BRVM-Composite.
+    
+    L'indice et sa moyenne mobile sont réduits par LTTB à EVOLUTION_MAX_POINTS
+    points avant d'être intégrés au HTML.
+    """
     if 'BRVM-Composite' in data_frames:
         brvm_composite = data_frames['BRVM-Composite']
         
+        # La moyenne mobile est calculée sur la série complète, avant réduction
+        moving_average = brvm_composite['Cloture'].rolling(window=50).mean()
+        dates, closes = downsample_series(brvm_composite['Date'], brvm_composite['Cloture'])
+        ma_dates, ma_values = downsample_series(brvm_composite['Date'], moving_average)
+        
         # Créer le graphique
         fig = px.line(
-            brvm_composite, 
-            x='Date', 
-            y='Cloture',
+            x=dates,
+            y=closes,
             title='Évolution de l\'indice BRVM-Composite',
-            labels={'Date': 'Date', 'Cloture': 'Valeur de l\'indice'}
+            labels={'x': 'Date', 'y': 'Valeur de l\'indice'}
         )
         
         # Ajouter une ligne de tendance
         fig.add_trace(
             go.Scatter(
-                x=brvm_composite['Date'],
-                y=brvm_composite['Cloture'].rolling(window=50).mean(),
+                x=ma_dates,
+                y=ma_values,
                 mode='lines',
                 name='Moyenne mobile (50 jours)',
                 line=dict(color='red', width=1)
@@ -238,60 +211,59 @@ def create_brvm_evolution_chart(data_frames):
         # Mise en page
         fig.update_layout(
             autosize=True,
-            margin=dict(l=50, r=50, b=50, t=100, pad=4),
-            legend=dict(
-                orientation="h",
-                yanchor="bottom",
-                y=1.02,
-                xanchor="right",
-                x=1
-            )
+            margin=CHART_MARGIN,
+            legend=TOP_LEGEND
         )
         
-        return fig.to_html(full_html=False, include_plotlyjs='cdn')
+        return fig.to_html(full_html=False, include_plotlyjs=False, div_id='brvm-evolution-chart')
     else:
         return "<p>Données de l'indice BRVM-Composite non disponibles.</p>"
 
-def create_risk_return_chart(perf_df):
-    """Créer un graphique risque/rendement interactif."""
-    # Obtenir classification sectorielle
-    symbol_to_sector = get_sector_classification()
-    perf_df['Secteur'] = perf_df.index.map(
-        lambda x: symbol_to_sector.get(x, 'Indice' if x.startswith('BRVM') else 'Autres')
-    )
-    
-    # Filtrer pour garder uniquement les valeurs (pas les indices)
-    values_df = perf_df[~perf_df.index.str.startswith('BRVM')].copy()
-    
-    # Ajouter le symbole comme colonne pour l'affichage
-    values_df['Symbole'] = values_df.index
+def create_risk_return_chart(values_df):
+    """
+    Créer un graphique risque/rendement interactif.
     
-    # Créer le graphique
-    fig = px.scatter(
-        values_df, 
-        x='volatility', 
-        y='annual_return',
-        size='total_return',
-        color='Secteur',
-        hover_name='Symbole',
-        hover_data={
-            'Symbole': True,
-            'Secteur': True,
-            'annual_return': ':.2f',
-            'volatility': ':.2f',
-            'sharpe_ratio': ':.2f',
-            'total_return': ':.2f'
-        },
-        title='Risque vs Rendement des valeurs de la BRVM',
-        labels={
-            'volatility': 'Volatilité annualisée (%)',
-            'annual_return': 'Rendement annualisé (%)',
-            'total_return': 'Performance totale (%)',
-            'sharpe_ratio': 'Ratio de Sharpe'
-        },
-        size_max=50
+    Args:
+        values_df (pd.DataFrame): Performances des valeurs seules (sans les indices
+            BRVM), avec la colonne 'Secteur'
+    """
+    # Taille des bulles proportionnelle à la performance totale (les performances
+    # négatives, qui ne peuvent pas servir de taille, sont ramenées à zéro)
+    sizes = values_df['total_return'].clip(lower=0).fillna(0)
+    size_max = 50
+    sizeref = 2.0 * sizes.max() / size_max ** 2 if sizes.max() > 0 else 1
+    
+    hovertemplate = (
+        '<b>%{text}</b><br>'
+        'Secteur=%{customdata[0]}<br>'
+        'Volatilité annualisée (%)=%{x:.2f}<br>'
+        'Rendement annualisé (%)=%{y:.2f}<br>'
+        'Ratio de Sharpe=%{customdata[1]:.2f}<br>'
+        'Performance totale (%)=%{customdata[2]:.2f}'
+        '<extra></extra>'
     )
     
+    # Créer le graphique, une trace par secteur
+    fig = go.Figure()
+    for sector, sub in values_df.groupby('Secteur', sort=False, observed=True):
+        fig.add_trace(go.Scatter(
+            x=sub['volatility'],
+            y=sub['annual_return'],
+            mode='markers',
+            name=sector,
+            text=sub.index,
+            customdata=np.column_stack([
+                sub['Secteur'], sub['sharpe_ratio'], sub['total_return']
+            ]),
+            marker=dict(
+                size=sizes[sub.index],
+                sizemode='area',
+                sizeref=sizeref,
+                sizemin=0
+            ),
+            hovertemplate=hovertemplate
+        ))
+    
     # Ajouter lignes de référence
     fig.add_shape(
         type="line",
@@ -307,239 +279,225 @@ def create_risk_return_chart(perf_df):
     
     # Mise en page
     fig.update_layout(
+        title='Risque vs Rendement des valeurs de la BRVM',
+        xaxis_title='Volatilité annualisée (%)',
+        yaxis_title='Rendement annualisé (%)',
+        legend_title_text='Secteur',
         autosize=True,
-        margin=dict(l=50, r=50, b=50, t=100, pad=4),
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
+        margin=CHART_MARGIN,
+        legend=TOP_LEGEND
     )
     
-    return fig.to_html(full_html=False, include_plotlyjs='cdn')
+    return fig.to_html(full_html=False, include_plotlyjs=False, div_id='risk-return-chart')
+
+def format_number(value):
+    """Formater un nombre à deux décimales pour le tableau HTML."""
+    return 'NaN' if np.isnan(value) else f"{value:.2f}"
 
 def create_performance_table(perf_df):
-    """Créer un tableau HTML des performances des valeurs."""
-    # Sélectionner les colonnes pertinentes
+    """Créer un tableau HTML des performances des valeurs (colonne 'Secteur' requise)."""
+    # Sélectionner les colonnes pertinentes, triées par performance totale
     performance_table = perf_df[[
-        'total_return', 'annual_return', 'volatility', 
+        'Secteur', 'total_return', 'annual_return', 'volatility',
         'sharpe_ratio', 'max_drawdown', 'duration_years'
-    ]].copy()
+    ]].sort_values('total_return', ascending=False)
     
-    # Obtenir classification sectorielle
-    symbol_to_sector = get_sector_classification()
-    performance_table['Secteur'] = perf_df.index.map(
-        lambda x: symbol_to_sector.get(x, 'Indice' if x.startswith('BRVM') else 'Autres')
-    )
-    
-    # Renommer les colonnes
-    performance_table.columns = [
-        'Performance totale (%)', 'Performance annualisée (%)',
-        'Volatilité (%)', 'Ratio de Sharpe', 'Drawdown max (%)',
-        'Durée (années)', 'Secteur'
+    headers = [
+        'Symbole', 'Secteur', 'Performance totale (%)', 'Performance annualisée (%)',
+        'Volatilité (%)', 'Ratio de Sharpe', 'Drawdown max (%)', 'Durée (années)'
     ]
     
-    # Réorganiser les colonnes
-    performance_table = performance_table[[
-        'Secteur', 'Performance totale (%)', 'Performance annualisée (%)',
-        'Volatilité (%)', 'Ratio de Sharpe', 'Drawdown max (%)',
-        'Durée (années)'
-    ]]
-    
-    # Trier par performance totale
-    performance_table = performance_table.sort_values('Performance totale (%)', ascending=False)
-    
-    # Formater les valeurs
-    for col in performance_table.columns:
-        if col != 'Secteur':
-            performance_table[col] = performance_table[col].round(2)
-    
-    # Convertir en HTML avec style
-    html_table = performance_table.to_html(
-        classes=['table', 'table-striped', 'table-hover', 'table-sm'],
-        border=0
+    # Construire le HTML directement, une ligne par valeur
+    rows = []
+    for row in performance_table.itertuples(index=True, name=None):
+        symbol, sector, *values = row
+        cells = ''.join(f"<td>{format_number(value)}</td>" for value in values)
+        rows.append(
+            f"    <tr>\n      <th>{escape(str(symbol))}</th>"
+            f"<td>{escape(str(sector))}</td>{cells}\n    </tr>"
+        )
+    
+    header_cells = ''.join(f"<th>{escape(header)}</th>" for header in headers)
+    html_table = (
+        '<table class="table table-striped table-hover table-sm">\n'
+        f'  <thead>\n    <tr style="text-align: right;">{header_cells}</tr>\n  </thead>\n'
+        '  <tbody>\n' + '\n'.join(rows) + '\n  </tbody>\n</table>'
     )
     
     return html_table
 
-def create_dashboard(data_frames, output_dir="../dashboard"):
-    """Créer un tableau de bord HTML interactif."""
-    ensure_directory(output_dir)
-    
-    # Calculer les performances
-    logger.info("Calcul des performances...")
-    performances = {}
-    for symbol, df in data_frames.items():
-        try:
-            perf = calculate_performance(df)
-            if perf:  # Si le calcul a réussi
-                performances[symbol] = perf
-        except Exception as e:
-            logger.error(f"Erreur lors du calcul des performances pour {symbol}: {str(e)}")
-    
-    # Créer un DataFrame avec toutes les performances
-    perf_df = pd.DataFrame.from_dict(performances, orient='index')
-    perf_df.index.name = 'Symbole'
-    
-    # Créer les graphiques
-    logger.info("Création des graphiques interactifs...")
-    performance_chart = create_performance_chart(perf_df)
-    sector_chart = create_sector_chart(perf_df)
-    brvm_evolution_chart = create_brvm_evolution_chart(data_frames)
-    risk_return_chart = create_risk_return_chart(perf_df)
-    
-    # Créer le tableau de performance
-    performance_table = create_performance_table(perf_df)
-    
-    # Préparer le modèle de template
-    logger.info("Génération de la page HTML...")
-    template_str = """
-    <!DOCTYPE html>
-    <html lang="fr">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Tableau de bord BRVM</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 20px;
-                background-color: #f8f9fa;
-            }
-            .container {
-                max-width: 1200px;
-                margin: 0 auto;
-            }
-            .card {
-                margin-bottom: 20px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            }
-            .chart-container {
-                background-color: white;
-                padding: 15px;
-                border-radius: 5px;
-            }
-            .table-container {
-                background-color: white;
-                padding: 15px;
-                border-radius: 5px;
-                overflow-x: auto;
-            }
-            h1, h2, h3 {
-                color: #0d6efd;
-            }
-            .header {
-                text-align: center;
-                margin-bottom: 30px;
-                background-color: white;
-                padding: 20px;
-                border-radius: 5px;
-                box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
-            }
-            .table {
-                width: 100%;
-                font-size: 0.9rem;
-            }
-            .footer {
-                text-align: center;
-                margin-top: 30px;
-                padding: 10px;
-                background-color: #343a40;
-                color: white;
-                border-radius: 5px;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Analyse des performances de la BRVM</h1>
-                <p class="text-muted">Rapport généré le {{ date_generation }}</p>
-            </div>
-            
-            <div class="row">
-                <div class="col-md-12">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Évolution de l'indice BRVM-Composite</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {{ brvm_evolution_chart }}
-                        </div>
+# Modèle de la page, compilé une seule fois au chargement du module
+DASHBOARD_TEMPLATE = jinja2.Template("""
+<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Tableau de bord BRVM</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+    <script charset="utf-8" src="{{ plotly_js_url }}"></script>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            margin: 0;
+            padding: 20px;
+            background-color: #f8f9fa;
+        }
+        .container {
+            max-width: 1200px;
+            margin: 0 auto;
+        }
+        .card {
+            margin-bottom: 20px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        }
+        .chart-container {
+            background-color: white;
+            padding: 15px;
+            border-radius: 5px;
+        }
+        .table-container {
+            background-color: white;
+            padding: 15px;
+            border-radius: 5px;
+            overflow-x: auto;
+        }
+        h1, h2, h3 {
+            color: #0d6efd;
+        }
+        .header {
+            text-align: center;
+            margin-bottom: 30px;
+            background-color: white;
+            padding: 20px;
+            border-radius: 5px;
+            box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
+        }
+        .table {
+            width: 100%;
+            font-size: 0.9rem;
+        }
+        .footer {
+            text-align: center;
+            margin-top: 30px;
+            padding: 10px;
+            background-color: #343a40;
+            color: white;
+            border-radius: 5px;
+        }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Analyse des performances de la BRVM</h1>
+            <p class="text-muted">Rapport généré le {{ date_generation }}</p>
+        </div>
+        
+        <div class="row">
+            <div class="col-md-12">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Évolution de l'indice BRVM-Composite</h2>
+                    </div>
+                    <div class="card-body chart-container">
+                        {{ brvm_evolution_chart }}
                     </div>
                 </div>
             </div>
-            
-            <div class="row">
-                <div class="col-md-6">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Performances des 15 meilleures valeurs</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {{ performance_chart }}
-                        </div>
+        </div>
+        
+        <div class="row">
+            <div class="col-md-6">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Performances des 15 meilleures valeurs</h2>
                     </div>
-                </div>
-                <div class="col-md-6">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Performances par secteur</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {{ sector_chart }}
-                        </div>
+                    <div class="card-body chart-container">
+                        {{ performance_chart }}
                     </div>
                 </div>
             </div>
-            
-            <div class="row">
-                <div class="col-md-12">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Analyse Risque/Rendement</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {{ risk_return_chart }}
-                        </div>
+            <div class="col-md-6">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Performances par secteur</h2>
+                    </div>
+                    <div class="card-body chart-container">
+                        {{ sector_chart }}
                     </div>
                 </div>
             </div>
-            
-            <div class="row">
-                <div class="col-md-12">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Tableau des performances</h2>
-                        </div>
-                        <div class="card-body table-container">
-                            {{ performance_table }}
-                        </div>
+        </div>
+        
+        <div class="row">
+            <div class="col-md-12">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Analyse Risque/Rendement</h2>
+                    </div>
+                    <div class="card-body chart-container">
+                        {{ risk_return_chart }}
                     </div>
                 </div>
             </div>
-            
-            <div class="footer">
-                <p>© {{ year }} - Analyse des performances de la BRVM</p>
+        </div>
+        
+        <div class="row">
+            <div class="col-md-12">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Tableau des performances</h2>
+                    </div>
+                    <div class="card-body table-container">
+                        {{ performance_table }}
+                    </div>
+                </div>
             </div>
         </div>
         
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    </body>
-    </html>
-    """
+        <div class="footer">
+            <p>© {{ year }} - Analyse des performances de la BRVM</p>
+        </div>
+    </div>
+    
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+</body>
+</html>
+""")
+
+def create_dashboard(data_frames, output_dir="../dashboard"):
+    """Créer un tableau de bord HTML interactif."""
+    ensure_directory(output_dir)
     
-    # Compiler le template
-    template = jinja2.Template(template_str)
+    # Calculer les performances de toutes les valeurs
+    logger.info("Calcul des performances...")
+    perf_df = calculate_performances(data_frames)
+    
+    # Créer les graphiques
+    logger.info("Création des graphiques interactifs...")
+    performance_chart = create_performance_chart(perf_df)
+    sector_chart = create_sector_chart(perf_df)
+    brvm_evolution_chart = create_brvm_evolution_chart(data_frames)
     
-    # Générer la page HTML
-    html_content = template.render(
+    # Le graphique risque/rendement ne porte que sur les valeurs, pas sur les indices
+    risk_return_chart = create_risk_return_chart(perf_df.loc[~perf_df['is_index']])
+    
+    # Créer le tableau de performance
+    performance_table = create_performance_table(perf_df)
+    
+    # Nom du fichier avec date et heure
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    html_file = os.path.join(output_dir, f"brvm_dashboard_{timestamp}.html")
+    
+    # Générer la page HTML: les fragments du template sont écrits au fil de l'eau
+    # dans le fichier HTML et dans sa version compressée (.html.zst), sans
+    # construire la page complète en mémoire
+    logger.info("Génération de la page HTML...")
+    fragments = DASHBOARD_TEMPLATE.generate(
         date_generation=datetime.now().strftime("%d/%m/%Y à %H:%M"),
         year=datetime.now().year,
+        plotly_js_url=PLOTLY_JS_URL,
         brvm_evolution_chart=brvm_evolution_chart,
         performance_chart=performance_chart,
         sector_chart=sector_chart,
@@ -547,13 +505,14 @@ def create_dashboard(data_frames, output_dir="../dashboard"):
         performance_table=performance_table
     )
     
-    # Nom du fichier avec date et heure
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    html_file = os.path.join(output_dir, f"brvm_dashboard_{timestamp}.html")
-    
     # Écrire le fichier HTML
-    with open(html_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    with open(html_file, 'wb', buffering=WRITE_BUFFER_SIZE) as f, \
+            open(f"{html_file}.zst", 'wb') as zf, \
+            zstd.ZstdCompressor(level=10).stream_writer(zf) as compressed:
+        for fragment in fragments:
+            data = fragment.encode('utf-8')
+            f.write(data)
+            compressed.write(data)
     
     logger.info(f"Tableau de bord généré avec succès: {html_file}")
     
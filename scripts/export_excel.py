@@ -6,10 +6,7 @@ Script pour exporter les données et les analyses de la BRVM au format Excel.
 """
 
 import os
-import glob
 import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
 from datetime import datetime
 import sys
 import logging
@@ -25,259 +22,208 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BRVM_Excel_Export")
 
-def ensure_directory(directory):
-    """S'assurer que le répertoire existe, le créer si nécessaire."""
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-        logger.info(f"Répertoire '{directory}' créé.")
+from _brvm_common import (
+    ensure_directory, load_data, calculate_performances,
+    calculate_sector_performances
+)
 
-def load_data(data_dir="../data"):
-    """Charger toutes les données des fichiers CSV."""
-    logger.info(f"Chargement des données depuis {data_dir}...")
-    
-    all_files = glob.glob(os.path.join(data_dir, "*.csv"))
-    
-    if not all_files:
-        logger.error(f"Aucun fichier CSV trouvé dans {data_dir}")
-        return {}
-    
-    data_frames = {}
-    
-    for file_path in all_files:
-        file_name = os.path.basename(file_path)
-        symbol = file_name.split('_')[0]
-        
-        try:
-            df = pd.read_csv(file_path)
-            
-            # Convertir la date en format datetime
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-            # S'assurer que les colonnes numériques le sont bien
-            for col in ['Ouverture', 'Plus_Haut', 'Plus_Bas', 'Cloture', 'Volume']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Trier par date
-            df = df.sort_values('Date')
-            
-            data_frames[symbol] = df
-            logger.info(f"Chargé {len(df)} lignes pour {symbol}")
-        except Exception as e:
-            logger.error(f"Erreur lors du chargement de {file_path}: {str(e)}")
-    
-    return data_frames
+# Options du classeur: les chaînes (symboles, secteurs) sont écrites telles quelles,
+# sans recherche de formules, d'URL ou de nombres à chaque cellule. Le mode
+# constant_memory n'est pas utilisé: DataFrame.to_excel écrit colonne par colonne,
+# alors que ce mode n'accepte que des lignes écrites dans l'ordre
+WORKBOOK_OPTIONS = {
+    'strings_to_formulas': False,
+    'strings_to_urls': False,
+    'strings_to_numbers': False
+}
 
-def calculate_performance(df):
-    """Calculer les indicateurs de performance pour une valeur."""
-    if df.empty or len(df) < 2:
-        return {}
-    
-    # Calculer les rendements journaliers
-    df['Rendement'] = df['Cloture'].pct_change()
-    
-    # Dates de début et de fin
-    start_date = df['Date'].min()
-    end_date = df['Date'].max()
-    duration_days = (end_date - start_date).days
-    duration_years = duration_days / 365.25
-    
-    # Prix initial et final
-    initial_price = df.iloc[0]['Cloture']
-    final_price = df.iloc[-1]['Cloture']
-    
-    # Performance globale
-    total_return = (final_price / initial_price - 1) * 100
-    
-    # Performance annualisée
-    annual_return = (((final_price / initial_price) ** (1 / duration_years)) - 1) * 100 if duration_years > 0 else 0
-    
-    # Volatilité (écart-type des rendements journaliers annualisé)
-    volatility = df['Rendement'].std() * np.sqrt(252) * 100  # Annualisé en %
-    
-    # Ratio de Sharpe (en supposant un taux sans risque de 3%)
-    risk_free_rate = 0.03
-    sharpe_ratio = (annual_return / 100 - risk_free_rate) / (volatility / 100) if volatility > 0 else 0
-    
-    # Rendement max et min
-    max_daily_return = df['Rendement'].max() * 100
-    min_daily_return = df['Rendement'].min() * 100
-    
-    # Drawdown maximum
-    df['Cumul'] = (1 + df['Rendement']).cumprod()
-    df['Drawdown'] = df['Cumul'] / df['Cumul'].cummax() - 1
-    max_drawdown = df['Drawdown'].min() * 100
-    
-    return {
-        'start_date': start_date,
-        'end_date': end_date,
-        'duration_days': duration_days,
-        'duration_years': duration_years,
-        'initial_price': initial_price,
-        'final_price': final_price,
-        'total_return': total_return,
-        'annual_return': annual_return,
-        'volatility': volatility,
-        'sharpe_ratio': sharpe_ratio,
-        'max_daily_return': max_daily_return,
-        'min_daily_return': min_daily_return,
-        'max_drawdown': max_drawdown
-    }
+# Colonnes des feuilles par valeur et leurs en-têtes
+SHEET_COLUMNS = ['Date', 'Ouverture', 'Plus_Haut', 'Plus_Bas', 'Cloture', 'Volume']
+SHEET_HEADERS = ['Date', 'Ouverture', 'Plus Haut', 'Plus Bas', 'Clôture', 'Volume']
 
-def get_sector_classification():
-    """Obtenir la classification des secteurs pour les valeurs."""
-    sectors = {
-        'Banque': ['SGBCI', 'BOA', 'ECOBANK', 'SIB', 'NSIA', 'BICI', 'BDM', 'CORIS'],
-        'Agro-industrie': ['SOGB', 'SAPH', 'PALC', 'SIFCA', 'SICOR', 'SUCRIVOIRE'],
-        'Distribution': ['CFAO', 'BERNABE', 'VIVO', 'TOTAL'],
-        'Services publics': ['SODECI', 'CIE', 'SONATEL', 'ONATEL'],
-        'Industrie': ['NESTLE', 'SOLIBRA', 'SMB', 'UNIWAX', 'FILTISAC', 'AIR'],
-        'Transport': ['BOLLORE', 'MOVIS', 'SETAO']
-    }
-    
-    # Créer une table de correspondance symbole -> secteur
-    symbol_to_sector = {}
-    for sector, symbols in sectors.items():
-        for symbol in symbols:
-            symbol_to_sector[symbol] = sector
-    
-    return symbol_to_sector
+# Nombre maximal de feuilles par valeur dans un même fichier Excel
+MAX_SYMBOLS_PER_FILE = 20
+
+def to_cell_values(series):
+    """Convertir une colonne en valeurs de cellules (None pour les valeurs manquantes)."""
+    values = series.to_numpy(dtype=object)
+    values[series.isna().to_numpy()] = None
+    return values
+
+def add_formats(workbook):
+    """
+    Créer les formats partagés d'un classeur.
+    
+    Args:
+        workbook: Classeur xlsxwriter
+        
+    Returns:
+        tuple: Formats (date, nombre, titre)
+    """
+    # Format pour les dates
+    date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
+    
+    # Format pour les nombres
+    num_format = workbook.add_format({'num_format': '#,##0.00'})
+    
+    # Format pour les titres (partagé par toutes les feuilles)
+    header_format = workbook.add_format({
+        'bold': True,
+        'text_wrap': True,
+        'valign': 'top',
+        'fg_color': '#D7E4BC',
+        'border': 1
+    })
+    
+    return date_format, num_format, header_format
+
+def write_symbol_sheet(workbook, symbol, df, formats, max_rows_per_symbol=None):
+    """
+    Écrire l'historique d'une valeur sur sa propre feuille.
+    
+    Args:
+        workbook: Classeur xlsxwriter
+        symbol (str): Symbole de la valeur
+        df (pd.DataFrame): Historique de la valeur
+        formats (tuple): Formats partagés (voir add_formats)
+        max_rows_per_symbol (int, optional): Nombre maximal de lignes (les plus récentes)
+    """
+    date_format, num_format, header_format = formats
+    
+    if len(symbol) > 20:  # Excel a une limite de 31 caractères pour les noms de feuilles
+        sheet_name = symbol[:20]
+    else:
+        sheet_name = symbol
+    
+    logger.info(f"Création de la feuille pour {symbol}...")
+    
+    # Ne garder que les lignes les plus récentes si demandé
+    if max_rows_per_symbol is not None:
+        df = df.tail(max_rows_per_symbol)
+    
+    # Écrire les données colonne par colonne, directement avec xlsxwriter
+    column_formats = [date_format, num_format, num_format, num_format, num_format, None]
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, SHEET_HEADERS, header_format)
+    for col_idx, (column, cell_format) in enumerate(zip(SHEET_COLUMNS, column_formats)):
+        worksheet.write_column(1, col_idx, to_cell_values(df[column]), cell_format)
+    
+    # Ajuster le format
+    worksheet.set_column('A:A', 12, date_format)  # Date
+    worksheet.set_column('B:E', 10, num_format)  # Prix
+    worksheet.set_column('F:F', 12)  # Volume
 
-def export_to_excel(data_frames, output_dir="../exports"):
-    """Exporter les données et analyses au format Excel."""
+def export_to_excel(data_frames, output_dir="../exports", perf_df=None,
+                    max_symbols_per_file=MAX_SYMBOLS_PER_FILE, max_rows_per_symbol=None):
+    """
+    Exporter les données et analyses au format Excel.
+    
+    Au-delà de max_symbols_per_file valeurs, les feuilles par valeur sont réparties
+    sur plusieurs fichiers (brvm_analysis_{horodatage}_part{k}.xlsx); le résumé et
+    l'analyse sectorielle sont écrits dans le premier fichier uniquement.
+    
+    Args:
+        data_frames (dict): Historiques par symbole
+        output_dir (str): Répertoire de sortie
+        perf_df (pd.DataFrame, optional): Performances déjà calculées (voir
+            calculate_performances); calculées ici si elles ne sont pas fournies
+        max_symbols_per_file (int): Nombre maximal de feuilles par valeur dans un fichier
+        max_rows_per_symbol (int, optional): Nombre maximal de lignes (les plus
+            récentes) par feuille de valeur; toutes les lignes si None
+        
+    Returns:
+        list: Chemins des fichiers Excel créés
+    """
     ensure_directory(output_dir)
     
-    # Nom du fichier avec date et heure
+    # Répartir les valeurs en groupes d'au plus max_symbols_per_file
+    items = list(data_frames.items())
+    chunks = [items[i:i + max_symbols_per_file] for i in range(0, len(items), max_symbols_per_file)] or [[]]
+    
+    # Nom des fichiers avec date et heure
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    excel_file = os.path.join(output_dir, f"brvm_analysis_{timestamp}.xlsx")
+    if len(chunks) == 1:
+        excel_files = [os.path.join(output_dir, f"brvm_analysis_{timestamp}.xlsx")]
+    else:
+        excel_files = [
+            os.path.join(output_dir, f"brvm_analysis_{timestamp}_part{k}.xlsx")
+            for k in range(1, len(chunks) + 1)
+        ]
     
-    logger.info(f"Exportation des données vers {excel_file}...")
+    # Calculer les performances
+    if perf_df is None:
+        perf_df = calculate_performances(data_frames)
     
-    # Créer un writer Excel avec xlsxwriter comme moteur
-    with pd.ExcelWriter(excel_file, engine='xlsxwriter') as writer:
-        workbook = writer.book
-        
-        # Format pour les dates
-        date_format = workbook.add_format({'num_format': 'dd/mm/yyyy'})
-        
-        # Format pour les pourcentages
-        pct_format = workbook.add_format({'num_format': '0.00%'})
-        
-        # Format pour les nombres
-        num_format = workbook.add_format({'num_format': '#,##0.00'})
-        
-        # Format pour les titres
-        header_format = workbook.add_format({
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'top',
-            'fg_color': '#D7E4BC',
-            'border': 1
-        })
-        
-        # 1. Exporter un résumé global
-        logger.info("Création de la feuille de résumé...")
+    for part, (excel_file, chunk) in enumerate(zip(excel_files, chunks)):
+        logger.info(f"Exportation des données vers {excel_file}...")
         
-        # Calculer les performances
-        performances = {}
-        for symbol, df in data_frames.items():
-            try:
-                perf = calculate_performance(df)
-                if perf:  # Si le calcul a réussi
-                    performances[symbol] = perf
-            except Exception as e:
-                logger.error(f"Erreur lors du calcul des performances pour {symbol}: {str(e)}")
-        
-        # Créer un DataFrame avec toutes les performances
-        perf_df = pd.DataFrame.from_dict(performances, orient='index')
-        perf_df.index.name = 'Symbole'
-        
-        # Ajouter le secteur
-        symbol_to_sector = get_sector_classification()
-        perf_df['Secteur'] = perf_df.index.map(
-            lambda x: symbol_to_sector.get(x, 'Indice' if x.startswith('BRVM') else 'Autres')
-        )
-        
-        # Trier par performance totale
-        perf_df = perf_df.sort_values('total_return', ascending=False)
-        
-        # Sélectionner et renommer les colonnes pour le résumé
-        summary_df = perf_df[[
-            'Secteur', 'initial_price', 'final_price', 'total_return', 
-            'annual_return', 'volatility', 'sharpe_ratio', 'max_drawdown'
-        ]].copy()
-        
-        summary_df.columns = [
-            'Secteur', 'Prix Initial', 'Prix Final', 'Performance Totale (%)', 
-            'Performance Annualisée (%)', 'Volatilité (%)', 'Ratio de Sharpe', 'Drawdown Max (%)'
-        ]
-        
-        # Écrire le résumé
-        summary_df.to_excel(writer, sheet_name='Résumé', index=True)
-        
-        # Récupérer la feuille et ajuster le format
-        worksheet = writer.sheets['Résumé']
-        worksheet.set_column('A:A', 15)  # Symbole
-        worksheet.set_column('B:B', 15)  # Secteur
-        worksheet.set_column('C:D', 12, num_format)  # Prix
-        worksheet.set_column('E:H', 18, num_format)  # Performances
-        
-        # 2. Exporter chaque valeur sur sa propre feuille
-        for symbol, df in data_frames.items():
-            if len(symbol) > 20:  # Excel a une limite de 31 caractères pour les noms de feuilles
-                sheet_name = symbol[:20]
-            else:
-                sheet_name = symbol
+        # Créer un writer Excel avec xlsxwriter comme moteur
+        with pd.ExcelWriter(excel_file, engine='xlsxwriter', engine_kwargs={'options': WORKBOOK_OPTIONS}) as writer:
+            workbook = writer.book
+            formats = add_formats(workbook)
+            date_format, num_format, header_format = formats
             
-            logger.info(f"Création de la feuille pour {symbol}...")
+            if part == 0:
+                # 1. Exporter un résumé global
+                logger.info("Création de la feuille de résumé...")
+                
+                # Trier par performance totale
+                perf_df = perf_df.sort_values('total_return', ascending=False)
+                
+                # Sélectionner et renommer les colonnes pour le résumé
+                summary_df = perf_df[[
+                    'Secteur', 'initial_price', 'final_price', 'total_return', 
+                    'annual_return', 'volatility', 'sharpe_ratio', 'max_drawdown'
+                ]].copy()
+                
+                summary_df.columns = [
+                    'Secteur', 'Prix Initial', 'Prix Final', 'Performance Totale (%)', 
+                    'Performance Annualisée (%)', 'Volatilité (%)', 'Ratio de Sharpe', 'Drawdown Max (%)'
+                ]
+                
+                # Écrire le résumé (en-têtes écrits avec le format partagé)
+                summary_df.to_excel(writer, sheet_name='Résumé', index=True, header=False, startrow=1)
+                
+                # Récupérer la feuille et ajuster le format
+                worksheet = writer.sheets['Résumé']
+                worksheet.write_row(0, 0, [summary_df.index.name] + list(summary_df.columns), header_format)
+                worksheet.set_column('A:A', 15)  # Symbole
+                worksheet.set_column('B:B', 15)  # Secteur
+                worksheet.set_column('C:D', 12, num_format)  # Prix
+                worksheet.set_column('E:H', 18, num_format)  # Performances
             
-            # Reformater le DataFrame pour l'export
-            export_df = df[['Date', 'Ouverture', 'Plus_Haut', 'Plus_Bas', 'Cloture', 'Volume']].copy()
-            export_df.columns = ['Date', 'Ouverture', 'Plus Haut', 'Plus Bas', 'Clôture', 'Volume']
+            # 2. Exporter chaque valeur sur sa propre feuille
+            for symbol, df in chunk:
+                write_symbol_sheet(workbook, symbol, df, formats, max_rows_per_symbol)
             
-            # Écrire les données
-            export_df.to_excel(writer, sheet_name=sheet_name, index=False)
-            
-            # Récupérer la feuille et ajuster le format
-            worksheet = writer.sheets[sheet_name]
-            worksheet.set_column('A:A', 12, date_format)  # Date
-            worksheet.set_column('B:E', 10, num_format)  # Prix
-            worksheet.set_column('F:F', 12)  # Volume
-            
-        # 3. Exporter l'analyse sectorielle
-        logger.info("Création de la feuille d'analyse sectorielle...")
-        
-        # Analyser les performances par secteur
-        sector_perf = perf_df.groupby('Secteur').agg({
-            'total_return': 'mean',
-            'annual_return': 'mean',
-            'volatility': 'mean',
-            'sharpe_ratio': 'mean',
-            'max_drawdown': 'mean'
-        }).round(2)
-        
-        # Trier par performance annualisée
-        sector_perf = sector_perf.sort_values('annual_return', ascending=False)
-        
-        # Renommer les colonnes
-        sector_perf.columns = [
-            'Performance Totale Moyenne (%)', 
-            'Performance Annualisée Moyenne (%)', 
-            'Volatilité Moyenne (%)', 
-            'Ratio de Sharpe Moyen', 
-            'Drawdown Max Moyen (%)'
-        ]
-        
-        # Écrire l'analyse sectorielle
-        sector_perf.to_excel(writer, sheet_name='Analyse Sectorielle')
-        
-        # Récupérer la feuille et ajuster le format
-        worksheet = writer.sheets['Analyse Sectorielle']
-        worksheet.set_column('A:A', 18)  # Secteur
-        worksheet.set_column('B:F', 25, num_format)  # Métriques
-    
-    logger.info(f"Exportation terminée : {excel_file}")
-    return excel_file
+            if part == 0:
+                # 3. Exporter l'analyse sectorielle
+                logger.info("Création de la feuille d'analyse sectorielle...")
+                
+                # Analyser les performances par secteur
+                sector_perf = calculate_sector_performances(perf_df)
+                
+                # Renommer les colonnes
+                sector_perf.columns = [
+                    'Performance Totale Moyenne (%)', 
+                    'Performance Annualisée Moyenne (%)', 
+                    'Volatilité Moyenne (%)', 
+                    'Ratio de Sharpe Moyen', 
+                    'Drawdown Max Moyen (%)'
+                ]
+                
+                # Écrire l'analyse sectorielle (en-têtes écrits avec le format partagé)
+                sector_perf.to_excel(writer, sheet_name='Analyse Sectorielle', header=False, startrow=1)
+                
+                # Récupérer la feuille et ajuster le format
+                worksheet = writer.sheets['Analyse Sectorielle']
+                worksheet.write_row(0, 0, [sector_perf.index.name] + list(sector_perf.columns), header_format)
+                worksheet.set_column('A:A', 18)  # Secteur
+                worksheet.set_column('B:F', 25, num_format)  # Métriques
+        
+        logger.info(f"Exportation terminée : {excel_file}")
+    
+    return excel_files
 
 def main():
     """Fonction principale."""
@@ -291,9 +237,9 @@ def main():
         return
     
     # Exporter vers Excel
-    excel_file = export_to_excel(data_frames)
+    excel_files = export_to_excel(data_frames)
     
-    logger.info(f"Exportation Excel terminée avec succès. Fichier créé : {excel_file}")
+    logger.info(f"Exportation Excel terminée avec succès. Fichiers créés : {', '.join(excel_files)}")
 
 if __name__ == "__main__":
     main()
@@ -6,17 +6,22 @@ Script pour générer un rapport PDF des analyses des valeurs de la BRVM.
 """
 
 import os
+import io
 import sys
-import glob
-import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
 from datetime import datetime
 import logging
 from fpdf import FPDF
+from fpdf.enums import XPos, YPos
 import matplotlib
 matplotlib.use('Agg')  # Utiliser un backend non-interactif
+# Simplifier les tracés longs (moins de sommets à rendre)
+matplotlib.rcParams.update({
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000
+})
 
 # Ajouter le répertoire parent au path pour pouvoir importer les modules du projet
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,33 +34,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BRVM_PDF_Report")
 
+from _brvm_common import (
+    ensure_directory, load_data, calculate_performances,
+    calculate_sector_performances
+)
+
+# Résolution des images: le PDF les affiche sur 180 mm, 150 dpi suffisent
+CHART_DPI = 150
+SAVEFIG_KWARGS = {'dpi': CHART_DPI, 'bbox_inches': 'tight', 'pil_kwargs': {'optimize': True}}
+
+# Nombre maximal de points du graphique d'évolution de l'indice
+EVOLUTION_MAX_POINTS = 2000
+
+# Figure matplotlib réutilisée par tous les graphiques (voir render_chart)
+_figure = None
+
 class BRVMPDF(FPDF):
     """Classe personnalisée pour le rapport PDF."""
     
     def header(self):
         """En-tête du document."""
-        self.set_font('Arial', 'B', 15)
-        self.cell(0, 10, 'Analyse des performances de la BRVM', 0, 1, 'C')
-        self.set_font('Arial', 'I', 10)
-        self.cell(0, 10, f'Rapport généré le {datetime.now().strftime("%d/%m/%Y à %H:%M")}', 0, 1, 'C')
+        self.set_font('Helvetica', 'B', 15)
+        self.cell(0, 10, 'Analyse des performances de la BRVM', align='C',
+                  new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+        self.set_font('Helvetica', 'I', 10)
+        self.cell(0, 10, f'Rapport généré le {datetime.now().strftime("%d/%m/%Y à %H:%M")}', align='C',
+                  new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         self.ln(10)
     
     def footer(self):
         """Pied de page du document."""
         self.set_y(-15)
-        self.set_font('Arial', 'I', 8)
-        self.cell(0, 10, f'Page {self.page_no()}/{{nb}}', 0, 0, 'C')
+        self.set_font('Helvetica', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}/{{nb}}', align='C')
     
     def chapter_title(self, title):
         """Afficher un titre de chapitre."""
-        self.set_font('Arial', 'B', 12)
+        self.set_font('Helvetica', 'B', 12)
         self.set_fill_color(200, 220, 255)
-        self.cell(0, 6, title, 0, 1, 'L', 1)
+        self.cell(0, 6, title, fill=True, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
         self.ln(4)
     
     def chapter_body(self, body):
         """Afficher un corps de chapitre."""
-        self.set_font('Arial', '', 11)
+        self.set_font('Helvetica', '', 11)
         self.multi_cell(0, 5, body)
         self.ln()
     
@@ -65,300 +87,184 @@ class BRVMPDF(FPDF):
         w = self.w / len(header)
         
         # En-têtes
-        self.set_font('Arial', 'B', 10)
+        self.set_font('Helvetica', 'B', 10)
         self.set_fill_color(200, 220, 255)
         for col in header:
-            self.cell(w, 7, col, 1, 0, 'C', 1)
+            self.cell(w, 7, col, border=1, align='C', fill=True)
         self.ln()
         
         # Données
-        self.set_font('Arial', '', 10)
+        self.set_font('Helvetica', '', 10)
         self.set_fill_color(255, 255, 255)
         for row in data:
             for col in row:
-                self.cell(w, 6, str(col), 1, 0, 'C')
+                self.cell(w, 6, str(col), border=1, align='C')
             self.ln()
         
         self.ln(5)
     
-    def add_image(self, img_path, w=0, h=0, caption=None):
-        """Ajouter une image."""
-        if os.path.exists(img_path):
-            self.image(img_path, x=None, y=None, w=w, h=h)
+    def add_image(self, img, w=0, h=0, caption=None):
+        """Ajouter une image (chemin ou tampon PNG en mémoire)."""
+        if img is not None:
+            self.image(img, x=None, y=None, w=w, h=h)
             if caption:
-                self.set_font('Arial', 'I', 9)
+                self.set_font('Helvetica', 'I', 9)
                 self.ln(2)
-                self.cell(0, 5, caption, 0, 1, 'C')
+                self.cell(0, 5, caption, align='C', new_x=XPos.LMARGIN, new_y=YPos.NEXT)
                 self.ln(5)
         else:
-            logger.error(f"Image non trouvée: {img_path}")
+            logger.error("Image non trouvée")
 
-def ensure_directory(directory):
-    """S'assurer que le répertoire existe, le créer si nécessaire."""
-    if not os.path.exists(directory):
-        os.makedirs(directory)
-        logger.info(f"Répertoire '{directory}' créé.")
+def save_chart(fig):
+    """Enregistrer une figure au format PNG dans un tampon en mémoire."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', **SAVEFIG_KWARGS)
+    buffer.seek(0)
+    return buffer
 
-def load_data(data_dir="../data"):
-    """Charger toutes les données des fichiers CSV."""
-    logger.info(f"Chargement des données depuis {data_dir}...")
-    
-    all_files = glob.glob(os.path.join(data_dir, "*.csv"))
-    
-    if not all_files:
-        logger.error(f"Aucun fichier CSV trouvé dans {data_dir}")
-        return {}
+def render_chart(chart_function, data, figsize=(12, 8)):
+    """
+    Générer un graphique sur la figure partagée.
     
-    data_frames = {}
+    La figure est créée une seule fois puis vidée entre deux graphiques. Elle est vidée entièrement (clf) et non axe par axe: le graphique
+    risque/rendement ajoute un axe pour sa barre de couleur.
     
-    for file_path in all_files:
-        file_name = os.path.basename(file_path)
-        symbol = file_name.split('_')[0]
+    Args:
+        chart_function (callable): Fonction de graphique (données, axe)
+        data: Données du graphique
+        figsize (tuple): Taille de la figure en pouces
         
-        try:
-            df = pd.read_csv(file_path)
-            
-            # Convertir la date en format datetime
-            df['Date'] = pd.to_datetime(df['Date'])
-            
-            # S'assurer que les colonnes numériques le sont bien
-            for col in ['Ouverture', 'Plus_Haut', 'Plus_Bas', 'Cloture', 'Volume']:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Trier par date
-            df = df.sort_values('Date')
-            
-            data_frames[symbol] = df
-            logger.info(f"Chargé {len(df)} lignes pour {symbol}")
-        except Exception as e:
-            logger.error(f"Erreur lors du chargement de {file_path}: {str(e)}")
-    
-    return data_frames
+    Returns:
+        io.BytesIO: Image PNG du graphique, ou None s'il n'a pas pu être créé
+    """
+    global _figure
+    if _figure is None:
+        _figure = plt.figure()
+    _figure.clf()
+    _figure.set_size_inches(figsize)
+    ax = _figure.add_subplot()
+    return chart_function(data, ax)
 
-def calculate_performance(df):
-    """Calculer les indicateurs de performance pour une valeur."""
-    if df.empty or len(df) < 2:
-        return {}
-    
-    # Calculer les rendements journaliers
-    df['Rendement'] = df['Cloture'].pct_change()
-    
-    # Dates de début et de fin
-    start_date = df['Date'].min()
-    end_date = df['Date'].max()
-    duration_days = (end_date - start_date).days
-    duration_years = duration_days / 365.25
-    
-    # Prix initial et final
-    initial_price = df.iloc[0]['Cloture']
-    final_price = df.iloc[-1]['Cloture']
-    
-    # Performance globale
-    total_return = (final_price / initial_price - 1) * 100
-    
-    # Performance annualisée
-    annual_return = (((final_price / initial_price) ** (1 / duration_years)) - 1) * 100 if duration_years > 0 else 0
-    
-    # Volatilité (écart-type des rendements journaliers annualisé)
-    volatility = df['Rendement'].std() * np.sqrt(252) * 100  # Annualisé en %
-    
-    # Ratio de Sharpe (en supposant un taux sans risque de 3%)
-    risk_free_rate = 0.03
-    sharpe_ratio = (annual_return / 100 - risk_free_rate) / (volatility / 100) if volatility > 0 else 0
-    
-    # Rendement max et min
-    max_daily_return = df['Rendement'].max() * 100
-    min_daily_return = df['Rendement'].min() * 100
-    
-    # Drawdown maximum
-    df['Cumul'] = (1 + df['Rendement']).cumprod()
-    df['Drawdown'] = df['Cumul'] / df['Cumul'].cummax() - 1
-    max_drawdown = df['Drawdown'].min() * 100
-    
-    return {
-        'start_date': start_date,
-        'end_date': end_date,
-        'duration_days': duration_days,
-        'duration_years': duration_years,
-        'initial_price': initial_price,
-        'final_price': final_price,
-        'total_return': total_return,
-        'annual_return': annual_return,
-        'volatility': volatility,
-        'sharpe_ratio': sharpe_ratio,
-        'max_daily_return': max_daily_return,
-        'min_daily_return': min_daily_return,
-        'max_drawdown': max_drawdown
-    }
-
-def get_sector_classification():
-    """Obtenir la classification des secteurs pour les valeurs."""
-    sectors = {
-        'Banque': ['SGBCI', 'BOA', 'ECOBANK', 'SIB', 'NSIA', 'BICI', 'BDM', 'CORIS'],
-        'Agro-industrie': ['SOGB', 'SAPH', 'PALC', 'SIFCA', 'SICOR', 'SUCRIVOIRE'],
-        'Distribution': ['CFAO', 'BERNABE', 'VIVO', 'TOTAL'],
-        'Services publics': ['SODECI', 'CIE', 'SONATEL', 'ONATEL'],
-        'Industrie': ['NESTLE', 'SOLIBRA', 'SMB', 'UNIWAX', 'FILTISAC', 'AIR'],
-        'Transport': ['BOLLORE', 'MOVIS', 'SETAO']
-    }
-    
-    # Créer une table de correspondance symbole -> secteur
-    symbol_to_sector = {}
-    for sector, symbols in sectors.items():
-        for symbol in symbols:
-            symbol_to_sector[symbol] = sector
-    
-    return symbol_to_sector
-
-def generate_performance_chart(perf_df, output_dir):
+def generate_performance_chart(perf_df, ax):
     """Générer un graphique des performances totales."""
-    plt.figure(figsize=(12, 8))
-    
     # Sélectionner les 15 meilleures performances pour éviter un graphique trop chargé
     top_perf = perf_df.sort_values('total_return', ascending=False).head(15)
     
     # Créer le graphique
-    ax = sns.barplot(x=top_perf.index, y='total_return', data=top_perf)
+    ax.bar(top_perf.index, top_perf['total_return'])
     
-    plt.title('Performance totale des 15 meilleures valeurs (%)', fontsize=16)
-    plt.xticks(rotation=90)
-    plt.ylabel('Performance totale (%)')
-    plt.xlabel('Valeur')
+    ax.set_title('Performance totale des 15 meilleures valeurs (%)', fontsize=16)
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.set_ylabel('Performance totale (%)')
+    ax.set_xlabel('Valeur')
     
     # Ajouter les valeurs sur les barres
     for i, v in enumerate(top_perf['total_return']):
         ax.text(i, v + (5 if v >= 0 else -20), f"{v:.1f}%", ha='center', fontsize=10)
     
-    plt.tight_layout()
+    ax.figure.tight_layout()
     
-    # Sauvegarder le graphique
-    chart_path = os.path.join(output_dir, 'performance_chart.png')
-    plt.savefig(chart_path, dpi=200)
-    plt.close()
-    
-    return chart_path
+    # Sauvegarder le graphique en mémoire
+    return save_chart(ax.figure)
 
-def generate_sector_chart(perf_df, output_dir):
-    """Générer un graphique des performances par secteur."""
-    plt.figure(figsize=(12, 8))
-    
-    # Obtenir classification sectorielle
-    symbol_to_sector = get_sector_classification()
-    perf_df['Secteur'] = perf_df.index.map(
-        lambda x: symbol_to_sector.get(x, 'Indice' if x.startswith('BRVM') else 'Autres')
-    )
-    
-    # Analyser les performances par secteur
-    sector_perf = perf_df.groupby('Secteur').agg({'annual_return': 'mean'}).round(2)
-    sector_perf = sector_perf.sort_values('annual_return', ascending=False)
-    
+def generate_sector_chart(sector_perf, ax):
+    """Générer un graphique des performances par secteur (voir calculate_sector_performances)."""
     # Créer le graphique
-    ax = sns.barplot(x=sector_perf.index, y='annual_return', data=sector_perf)
+    ax.bar(sector_perf.index, sector_perf['annual_return'])
     
-    plt.title('Performance annualisée moyenne par secteur (%)', fontsize=16)
-    plt.xticks(rotation=45)
-    plt.ylabel('Performance annualisée moyenne (%)')
-    plt.xlabel('Secteur')
+    ax.set_title('Performance annualisée moyenne par secteur (%)', fontsize=16)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.set_ylabel('Performance annualisée moyenne (%)')
+    ax.set_xlabel('Secteur')
     
     # Ajouter les valeurs sur les barres
     for i, v in enumerate(sector_perf['annual_return']):
         ax.text(i, v + (1 if v >= 0 else -3), f"{v:.1f}%", ha='center')
     
-    plt.tight_layout()
-    
-    # Sauvegarder le graphique
-    chart_path = os.path.join(output_dir, 'sector_chart.png')
-    plt.savefig(chart_path, dpi=200)
-    plt.close()
+    ax.figure.tight_layout()
     
-    return chart_path
+    # Sauvegarder le graphique en mémoire
+    return save_chart(ax.figure)
 
-def generate_brvm_evolution_chart(data_frames, output_dir):
+def generate_brvm_evolution_chart(data_frames, ax):
     """Générer un graphique de l'évolution de l'indice BRVM-Composite."""
     if 'BRVM-Composite' in data_frames:
-        plt.figure(figsize=(12, 6))
-        
         brvm_composite = data_frames['BRVM-Composite']
-        plt.plot(brvm_composite['Date'], brvm_composite['Cloture'])
         
-        plt.title('Évolution de l\'indice BRVM-Composite', fontsize=16)
-        plt.xlabel('Date')
-        plt.ylabel('Valeur de l\'indice')
-        plt.grid(True)
-        plt.tight_layout()
+        # Sous-échantillonner les historiques trop longs
+        if len(brvm_composite) > EVOLUTION_MAX_POINTS:
+            step = -(-len(brvm_composite) // EVOLUTION_MAX_POINTS)
+            brvm_composite = brvm_composite.iloc[::step]
         
-        # Sauvegarder le graphique
-        chart_path = os.path.join(output_dir, 'brvm_evolution.png')
-        plt.savefig(chart_path, dpi=200)
-        plt.close()
+        ax.plot(brvm_composite['Date'], brvm_composite['Cloture'])
         
-        return chart_path
+        ax.set_title('Évolution de l\'indice BRVM-Composite', fontsize=16)
+        ax.set_xlabel('Date')
+        ax.set_ylabel('Valeur de l\'indice')
+        ax.grid(True)
+        ax.figure.tight_layout()
+        
+        # Sauvegarder le graphique en mémoire
+        return save_chart(ax.figure)
     else:
         return None
 
-def generate_risk_return_chart(perf_df, output_dir):
+def generate_risk_return_chart(perf_df, ax):
     """Générer un graphique risque/rendement."""
-    plt.figure(figsize=(12, 8))
-    
     # Filtrer pour garder uniquement les valeurs (pas les indices)
-    values_df = perf_df[~perf_df.index.str.startswith('BRVM')]
+    values_df = perf_df[~perf_df['is_index']]
     
-    # Créer le graphique
-    ax = sns.scatterplot(x='volatility', y='annual_return', size='total_return', 
-                         hue='sharpe_ratio', data=values_df, sizes=(50, 300))
+    # Créer le graphique (taille des points de 50 à 300 selon la performance totale)
+    total_return = values_df['total_return']
+    sizes = np.interp(total_return, (total_return.min(), total_return.max()), (50, 300))
+    scatter = ax.scatter(values_df['volatility'], values_df['annual_return'], s=sizes,
+                         c=values_df['sharpe_ratio'], cmap='viridis')
     
-    plt.title('Risque vs Rendement des valeurs de la BRVM', fontsize=16)
-    plt.xlabel('Volatilité annualisée (%)')
-    plt.ylabel('Rendement annualisé (%)')
-    plt.axhline(y=0, color='red', linestyle='--', alpha=0.5)
-    plt.axvline(x=0, color='red', linestyle='--', alpha=0.5)
+    ax.set_title('Risque vs Rendement des valeurs de la BRVM', fontsize=16)
+    ax.set_xlabel('Volatilité annualisée (%)')
+    ax.set_ylabel('Rendement annualisé (%)')
+    ax.axhline(y=0, color='red', linestyle='--', alpha=0.5)
+    ax.axvline(x=0, color='red', linestyle='--', alpha=0.5)
     
     # Ajouter des annotations pour chaque point (maximum 10 pour la lisibilité)
     top_sharpe = values_df.sort_values('sharpe_ratio', ascending=False).head(10)
     for symbol in top_sharpe.index:
         x = values_df.loc[symbol, 'volatility']
         y = values_df.loc[symbol, 'annual_return']
-        plt.annotate(symbol, (x, y), fontsize=8, ha='center')
+        ax.annotate(symbol, (x, y), fontsize=8, ha='center')
     
-    plt.colorbar(ax.collections[0], label="Ratio de Sharpe")
-    plt.tight_layout()
+    ax.figure.colorbar(scatter, ax=ax, label="Ratio de Sharpe")
+    ax.figure.tight_layout()
     
-    # Sauvegarder le graphique
-    chart_path = os.path.join(output_dir, 'risk_return_chart.png')
-    plt.savefig(chart_path, dpi=200)
-    plt.close()
-    
-    return chart_path
+    # Sauvegarder le graphique en mémoire
+    return save_chart(ax.figure)
 
-def generate_pdf_report(data_frames, output_dir="../reports"):
-    """Générer un rapport PDF avec les analyses des valeurs de la BRVM."""
+def generate_pdf_report(data_frames, output_dir="../reports", perf_df=None):
+    """
+    Générer un rapport PDF avec les analyses des valeurs de la BRVM.
+    
+    Args:
+        data_frames (dict): Historiques par symbole
+        output_dir (str): Répertoire de sortie
+        perf_df (pd.DataFrame, optional): Performances déjà calculées (voir
+            calculate_performances); calculées ici si elles ne sont pas fournies
+    """
     ensure_directory(output_dir)
     
-    # Créer un répertoire temporaire pour les graphiques
-    temp_dir = os.path.join(output_dir, "temp")
-    ensure_directory(temp_dir)
-    
     # Calculer les performances
-    performances = {}
-    for symbol, df in data_frames.items():
-        try:
-            perf = calculate_performance(df)
-            if perf:  # Si le calcul a réussi
-                performances[symbol] = perf
-        except Exception as e:
-            logger.error(f"Erreur lors du calcul des performances pour {symbol}: {str(e)}")
-    
-    # Créer un DataFrame avec toutes les performances
-    perf_df = pd.DataFrame.from_dict(performances, orient='index')
-    perf_df.index.name = 'Symbole'
-    
-    # Générer les graphiques
+    if perf_df is None:
+        perf_df = calculate_performances(data_frames)
+    
+    # Générer les graphiques l'un après l'autre sur la même figure: ils sont peu
+    # nombreux et rapides à dessiner, un pool de processus coûterait plus cher
+    # (import de pandas, Numba et matplotlib dans chaque processus) qu'il ne fait
+    # gagner. Les images sont gardées en mémoire sous forme de tampons PNG
     logger.info("Génération des graphiques...")
-    performance_chart = generate_performance_chart(perf_df, temp_dir)
-    sector_chart = generate_sector_chart(perf_df, temp_dir)
-    brvm_evolution_chart = generate_brvm_evolution_chart(data_frames, temp_dir)
-    risk_return_chart = generate_risk_return_chart(perf_df, temp_dir)
+    sector_perf = calculate_sector_performances(perf_df)
+    performance_chart = render_chart(generate_performance_chart, perf_df)
+    sector_chart = render_chart(generate_sector_chart, sector_perf)
+    brvm_evolution_chart = render_chart(generate_brvm_evolution_chart, data_frames, (12, 6))
+    risk_return_chart = render_chart(generate_risk_return_chart, perf_df)
     
     # Nom du fichier PDF avec date et heure
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -417,12 +323,6 @@ def generate_pdf_report(data_frames, output_dir="../reports"):
     # Préparer les données pour le tableau
     top_10 = perf_df.sort_values('annual_return', ascending=False).head(10)
     
-    # Obtenir classification sectorielle
-    symbol_to_sector = get_sector_classification()
-    top_10['Secteur'] = top_10.index.map(
-        lambda x: symbol_to_sector.get(x, 'Indice' if x.startswith('BRVM') else 'Autres')
-    )
-    
     # Sélectionner et formater les colonnes pour le tableau
     table_data = []
     for symbol, row in top_10.iterrows():
@@ -476,11 +376,6 @@ def generate_pdf_report(data_frames, output_dir="../reports"):
     
     logger.info(f"Rapport PDF généré avec succès: {pdf_file}")
     
-    # Nettoyer les fichiers temporaires
-    for file in os.listdir(temp_dir):
-        os.remove(os.path.join(temp_dir, file))
-    os.rmdir(temp_dir)
-    
     return pdf_file
 
 def main():
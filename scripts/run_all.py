@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Script pour générer l'export Excel et le rapport PDF en une seule exécution.
+
+Les historiques sont chargés et les performances calculées une seule fois, puis
+partagés par les deux exports.
+"""
+
+import os
+import sys
+import logging
+
+# Ajouter le répertoire parent au path pour pouvoir importer les modules du projet
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[logging.FileHandler("run_all.log"), logging.StreamHandler()]
+)
+logger = logging.getLogger("BRVM_Run_All")
+
+from _brvm_common import load_data, calculate_performances
+from export_excel import export_to_excel
+from generate_pdf_report import generate_pdf_report
+
+def main():
+    """Fonction principale."""
+    logger.info("Démarrage de la génération des exports Excel et PDF...")
+
+    # Charger les données
+    data_frames = load_data()
+
+    if not data_frames:
+        logger.error("Aucune donnée à analyser. Arrêt du processus.")
+        return
+
+    # Calculer les performances une seule fois pour les deux exports
+    logger.info("Calcul des performances...")
+    perf_df = calculate_performances(data_frames)
+
+    # Exporter vers Excel
+    excel_files = export_to_excel(data_frames, perf_df=perf_df)
+
+    # Générer le rapport PDF
+    pdf_file = generate_pdf_report(data_frames, perf_df=perf_df)
+
+    logger.info(f"Exports terminés avec succès. Fichiers créés : {', '.join(excel_files)}, {pdf_file}")
+
+if __name__ == "__main__":
+    main()
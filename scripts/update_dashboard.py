@@ -11,15 +11,17 @@ import os
 import sys
 import pandas as pd
 import numpy as np
-import requests
-from bs4 import BeautifulSoup
-import time
+from requests_cache import CachedSession
+import lxml.etree
 import re
-from datetime import datetime
+from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
+import jinja2
 import logging
-import shutil
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 # Configuration du logging
 logging.basicConfig(
@@ -29,20 +31,109 @@ logging.basicConfig(
 )
 logger = logging.getLogger("BRVM_Dashboard_Update")
 
+# Ajouter le répertoire parent au path pour pouvoir importer les modules du projet
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scraper._http_common import RateLimiter, ThrottledAdapter, parse_html
+
+# Cache disque (SQLite) des pages de Sika Finance, avec une durée de validité par
+# type de page: cotations du jour, fiche de cotation (capitalisation, nombre
+# d'actions) et fiche société (PER et dividendes historiques)
+CACHE_NAME = 'update_dashboard_cache'
+CACHE_EXPIRE_AFTER = {
+    'www.sikafinance.com/marches/cotations-brvm': timedelta(hours=1),
+    'www.sikafinance.com/marches/cotation_seance/*': timedelta(days=7),
+    'www.sikafinance.com/bourse/societe/*': timedelta(days=30)
+}
+
+# Récupération parallèle des pages par valeur: nombre de valeurs traitées en
+# parallèle et débit maximal de requêtes (pour ne pas surcharger le serveur)
+FETCH_WORKERS = 8
+REQUESTS_PER_SECOND = 4
+
+# Tableau des cotations (équivalent du sélecteur CSS "table.table-cotation")
+QUOTES_TABLE_XPATH = lxml.etree.XPath(
+    '//table[contains(concat(" ", normalize-space(@class), " "), " table-cotation ")]'
+)
+
+def label_value_xpath(label):
+    """
+    Compile l'expression XPath des éléments qui suivent un libellé.
+    
+    Sélectionne, pour chaque texte contenant `label` (sans distinction de casse),
+    le premier élément frère de son parent, qui porte la valeur associée. La
+    casse est neutralisée avec translate(), évalué par libxml2, plutôt qu'avec
+    une expression régulière EXSLT appelée en Python pour chaque texte.
+    """
+    letters = ''.join(sorted({char for char in label.lower() if char.isalpha()}))
+    return lxml.etree.XPath(
+        f'//text()[contains(translate(., "{letters.upper()}", "{letters}"), "{label.lower()}")]'
+        '/../following-sibling::*[1]'
+    )
+
+# Valeurs des libellés recherchés dans les pages de cotation, expressions
+# compilées une seule fois
+CAPITALISATION_XPATH = label_value_xpath('Capitalisation')
+SHARES_XPATH = label_value_xpath("Nombre d'actions")
+
+# Colonnes du tableau des cotations, dans l'ordre des cellules
+QUOTE_COLUMNS = ['symbol', 'name', 'sector', 'current_price', 'change', 'volume',
+                 'previous_price', 'year_high', 'year_low']
+QUOTE_NUMERIC_COLUMNS = QUOTE_COLUMNS[3:]
+QUOTE_NUMERIC_DTYPES = {
+    column: 'int64' if column == 'volume' else 'float64' for column in QUOTE_NUMERIC_COLUMNS
+}
+
+# Années des PER et dividendes récupérés
+FINANCIAL_YEARS = ('2020', '2021', '2022', '2023', '2024')
+
+# Libellés identifiant les tableaux de PER et de dividendes, par préfixe de clé
+FINANCIAL_TABLE_LABELS = {
+    'per': ('PER', 'P/E', 'Price Earning Ratio'),
+    'div': ('Dividende', 'DPA', 'Div/Action')
+}
+
+# Caractères à retirer pour extraire un nombre (avec ou sans virgule décimale)
+NON_DECIMAL_PATTERN = re.compile(r'[^\d,]')
+NON_DIGIT_PATTERN = re.compile(r'[^\d]')
+
+# Formats d'affichage du tableau complet : deux décimales avec séparateur de
+# milliers, capitalisations exprimées en milliards
+TABLE_FLOAT_FORMAT = '{:,.2f}'.format
+TABLE_FORMATTERS = {'market_cap': lambda x: f'{x / 1e9:,.2f} Md'}
+
 def ensure_directory(directory):
     """S'assurer que le répertoire existe, le créer si nécessaire."""
     if not os.path.exists(directory):
         os.makedirs(directory)
         logger.info(f"Répertoire '{directory}' créé.")
 
+@lru_cache(maxsize=1)
 def get_session():
-    """Initialise et renvoie une session HTTP avec les entêtes appropriés."""
-    session = requests.Session()
+    """
+    Initialise et renvoie une session HTTP avec les entêtes appropriés.
+    
+    Les réponses sont mises en cache sur disque (voir CACHE_EXPIRE_AFTER): une
+    relance ne retélécharge que les pages expirées. Une page expirée qui porte un
+    ETag ou une date Last-Modified est revalidée par une requête conditionnelle et
+    réutilisée si le serveur répond 304. La session est créée une seule fois par
+    processus, de sorte que des appels répétés à main() partagent ses connexions
+    et son cache. Le débit vers Sika Finance est limité (REQUESTS_PER_SECOND)
+    uniquement pour les requêtes qui atteignent le serveur.
+    """
+    session = CachedSession(
+        CACHE_NAME,
+        backend='sqlite',
+        expire_after=timedelta(hours=1),
+        urls_expire_after=CACHE_EXPIRE_AFTER,
+        match_headers=False
+    )
     session.headers.update({
         'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         'Accept-Language': 'fr-FR,fr;q=0.9,en-US;q=0.8,en;q=0.7',
         'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8'
     })
+    session.mount("https://www.sikafinance.com", ThrottledAdapter(RateLimiter(REQUESTS_PER_SECOND)))
     return session
 
 def get_brvm_values(session):
@@ -50,59 +141,60 @@ def get_brvm_values(session):
     url = "https://www.sikafinance.com/marches/cotations-brvm"
     
     try:
-        response = session.get(url)
+        # Les cotations changent à chaque séance: la page en cache est toujours
+        # revalidée par une requête conditionnelle (ETag / Last-Modified), un 304
+        # permettant de réutiliser la page en cache sans la retélécharger
+        response = session.get(url, refresh=True)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = parse_html(response)
         
         # Chercher le tableau des cotations
-        table = soup.find('table', class_='table-cotation')
+        tables = QUOTES_TABLE_XPATH(tree)
         
-        if not table:
+        if not tables:
             logger.error("Tableau des cotations non trouvé.")
             return []
+        table = tables[0]
         
-        values = []
-        rows = table.find_all('tr')[1:]  # Ignorer l'en-tête
-        
-        for row in rows:
-            cells = row.find_all('td')
+        # Extraire le texte brut des cellules, ligne par ligne
+        raw_rows = []
+        detail_links = []
+        for row in table.findall('.//tr')[1:]:  # Ignorer l'en-tête
+            cells = row.findall('.//td')
             if len(cells) >= 9:  # Vérifier qu'il y a assez de cellules
-                # Extraire les informations de base
-                try:
-                    symbol = cells[0].text.strip()
-                    name = cells[1].text.strip()
-                    sector = cells[2].text.strip()
-                    current_price = float(cells[3].text.strip().replace(' ', '').replace(',', '.') or 0)
-                    change = cells[4].text.strip().replace('%', '').replace(',', '.').replace(' ', '')
-                    change = float(change) if change else 0
-                    volume = int(cells[5].text.strip().replace(' ', '') or 0)
-                    previous_price = float(cells[6].text.strip().replace(' ', '').replace(',', '.') or 0)
-                    year_high = float(cells[7].text.strip().replace(' ', '').replace(',', '.') or 0)
-                    year_low = float(cells[8].text.strip().replace(' ', '').replace(',', '.') or 0)
-                    
-                    # Si possible, récupérer l'URL de la page de détail
-                    detail_link = None
-                    if cells[0].find('a'):
-                        detail_link = cells[0].find('a').get('href')
-                        if detail_link and not detail_link.startswith('http'):
-                            detail_link = f"https://www.sikafinance.com{detail_link}"
-                    
-                    values.append({
-                        'symbol': symbol,
-                        'name': name,
-                        'sector': sector,
-                        'current_price': current_price,
-                        'change': change,
-                        'volume': volume,
-                        'previous_price': previous_price,
-                        'year_high': year_high,
-                        'year_low': year_low,
-                        'detail_link': detail_link
-                    })
-                except Exception as e:
-                    logger.error(f"Erreur lors de l'extraction des données pour une valeur: {str(e)}")
-                    continue
+                raw_rows.append([cell.text_content().strip() for cell in cells[:9]])
+                
+                # Si possible, récupérer l'URL de la page de détail
+                detail_link = None
+                link = cells[0].find('.//a')
+                if link is not None:
+                    detail_link = link.get('href')
+                    if detail_link and not detail_link.startswith('http'):
+                        detail_link = f"https://www.sikafinance.com{detail_link}"
+                detail_links.append(detail_link)
+        
+        quotes = pd.DataFrame(raw_rows, columns=QUOTE_COLUMNS, dtype=object)
+        quotes['detail_link'] = pd.Series(detail_links, dtype=object)
+        
+        # Convertir les colonnes numériques en une passe par colonne: une cellule
+        # vide vaut 0, une ligne dont une cellule n'est pas un nombre est ignorée
+        invalid = pd.Series(False, index=quotes.index)
+        for column in QUOTE_NUMERIC_COLUMNS:
+            text = quotes[column].str.replace(' ', '', regex=False).str.replace(',', '.', regex=False)
+            if column == 'change':
+                text = text.str.replace('%', '', regex=False)
+            numbers = pd.to_numeric(text.replace('', '0'), errors='coerce')
+            if column == 'volume':
+                numbers = numbers.where(numbers % 1 == 0)
+            invalid |= numbers.isna()
+            quotes[column] = numbers
+        
+        for symbol in quotes.loc[invalid, 'symbol']:
+            logger.error(f"Erreur lors de l'extraction des données pour une valeur: {symbol}")
+        
+        quotes = quotes[~invalid].astype(QUOTE_NUMERIC_DTYPES)
+        values = quotes.to_dict('records')
         
         logger.info(f"Récupéré {len(values)} valeurs cotées à la BRVM.")
         return values
@@ -119,53 +211,45 @@ def get_market_cap(session, symbol, current_price):
         response = session.get(url)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = parse_html(response)
         
         # Chercher les informations de capitalisation boursière
         market_cap = None
         
         # Méthode 1 : chercher directement dans la page
-        cap_elements = soup.find_all(text=re.compile('Capitalisation', re.IGNORECASE))
+        cap_elements = CAPITALISATION_XPATH(tree)
         
-        for element in cap_elements:
-            parent = element.parent
-            if parent:
-                next_sibling = parent.find_next_sibling()
-                if next_sibling:
-                    cap_text = next_sibling.text.strip()
-                    # Extraire les chiffres
-                    cap_value = re.sub(r'[^\d,]', '', cap_text)
-                    if cap_value:
-                        try:
-                            market_cap = float(cap_value.replace(',', '.'))
-                            # Convertir en milliards si nécessaire
-                            if 'milliard' in cap_text.lower():
-                                market_cap *= 1e9
-                            elif 'million' in cap_text.lower():
-                                market_cap *= 1e6
-                            break
-                        except:
-                            pass
+        for value_element in cap_elements:
+            cap_text = value_element.text_content().strip()
+            # Extraire les chiffres
+            cap_value = NON_DECIMAL_PATTERN.sub('', cap_text)
+            if cap_value:
+                try:
+                    market_cap = float(cap_value.replace(',', '.'))
+                    # Convertir en milliards si nécessaire
+                    if 'milliard' in cap_text.lower():
+                        market_cap *= 1e9
+                    elif 'million' in cap_text.lower():
+                        market_cap *= 1e6
+                    break
+                except:
+                    pass
         
         # Si pas trouvé, méthode 2 : chercher le nombre d'actions
         if not market_cap:
-            shares_elements = soup.find_all(text=re.compile('Nombre d\'actions', re.IGNORECASE))
+            shares_elements = SHARES_XPATH(tree)
             
-            for element in shares_elements:
-                parent = element.parent
-                if parent:
-                    next_sibling = parent.find_next_sibling()
-                    if next_sibling:
-                        shares_text = next_sibling.text.strip()
-                        # Extraire les chiffres
-                        shares_value = re.sub(r'[^\d]', '', shares_text)
-                        if shares_value:
-                            try:
-                                shares = int(shares_value)
-                                market_cap = shares * current_price
-                                break
-                            except:
-                                pass
+            for value_element in shares_elements:
+                shares_text = value_element.text_content().strip()
+                # Extraire les chiffres
+                shares_value = NON_DIGIT_PATTERN.sub('', shares_text)
+                if shares_value:
+                    try:
+                        shares = int(shares_value)
+                        market_cap = shares * current_price
+                        break
+                    except:
+                        pass
         
         return market_cap
     
@@ -173,6 +257,32 @@ def get_market_cap(session, symbol, current_price):
         logger.error(f"Erreur lors de la récupération de la capitalisation pour {symbol}: {str(e)}")
         return None
 
+def read_year_values(table, prefix, financial_data):
+    """
+    Lire les valeurs annuelles d'un tableau financier.
+    
+    Chaque ligne dont la première cellule mentionne une année de FINANCIAL_YEARS
+    donne la valeur de cette année (deuxième cellule); '-' ou une cellule vide
+    signifie une valeur absente.
+    
+    Args:
+        table (lxml.html.HtmlElement): Tableau de la page
+        prefix (str): Préfixe des clés ('per' ou 'div')
+        financial_data (dict): Données financières à compléter
+    """
+    for row in table.findall('.//tr'):
+        cells = row.findall('.//td')
+        if len(cells) >= 2:
+            header = cells[0].text_content().strip()
+            for year in FINANCIAL_YEARS:
+                if year in header:
+                    value_text = cells[1].text_content().strip().replace(',', '.').replace(' ', '')
+                    try:
+                        financial_data[f'{prefix}_{year}'] = float(value_text) if value_text and value_text != '-' else None
+                    except ValueError:
+                        pass
+                    break
+
 def get_financial_data(session, symbol):
     """Récupère les données financières (PER, dividendes) pour une valeur donnée."""
     url = f"https://www.sikafinance.com/bourse/societe/{symbol}"
@@ -194,87 +304,19 @@ def get_financial_data(session, symbol):
         response = session.get(url)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        tree = parse_html(response)
         
         # Chercher les tableaux de données financières
-        tables = soup.find_all('table')
+        tables = tree.iter('table')
         
         for table in tables:
-            # Chercher les données de PER
-            if 'PER' in table.text or 'P/E' in table.text or 'Price Earning Ratio' in table.text:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        header = cells[0].text.strip()
-                        if '2020' in header:
-                            per_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['per_2020'] = float(per_text) if per_text and per_text != '-' else None
-                            except:
-                                pass
-                        elif '2021' in header:
-                            per_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['per_2021'] = float(per_text) if per_text and per_text != '-' else None
-                            except:
-                                pass
-                        elif '2022' in header:
-                            per_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['per_2022'] = float(per_text) if per_text and per_text != '-' else None
-                            except:
-                                pass
-                        elif '2023' in header:
-                            per_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['per_2023'] = float(per_text) if per_text and per_text != '-' else None
-                            except:
-                                pass
-                        elif '2024' in header:
-                            per_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['per_2024'] = float(per_text) if per_text and per_text != '-' else None
-                            except:
-                                pass
+            # Texte du tableau extrait une seule fois pour tous les libellés
+            table_text = table.text_content()
             
-            # Chercher les données de dividende
-            if 'Dividende' in table.text or 'DPA' in table.text or 'Div/Action' in table.text:
-                rows = table.find_all('tr')
-                for row in rows:
-                    cells = row.find_all('td')
-                    if len(cells) >= 2:
-                        header = cells[0].text.strip()
-                        if '2020' in header:
-                            div_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['div_2020'] = float(div_text) if div_text and div_text != '-' else None
-                            except:
-                                pass
-                        elif '2021' in header:
-                            div_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['div_2021'] = float(div_text) if div_text and div_text != '-' else None
-                            except:
-                                pass
-                        elif '2022' in header:
-                            div_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['div_2022'] = float(div_text) if div_text and div_text != '-' else None
-                            except:
-                                pass
-                        elif '2023' in header:
-                            div_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['div_2023'] = float(div_text) if div_text and div_text != '-' else None
-                            except:
-                                pass
-                        elif '2024' in header:
-                            div_text = cells[1].text.strip().replace(',', '.').replace(' ', '')
-                            try:
-                                financial_data['div_2024'] = float(div_text) if div_text and div_text != '-' else None
-                            except:
-                                pass
+            # Chercher les données de PER et de dividende (un tableau peut contenir les deux)
+            for prefix, labels in FINANCIAL_TABLE_LABELS.items():
+                if any(label in table_text for label in labels):
+                    read_year_values(table, prefix, financial_data)
         
         return financial_data
     
@@ -282,8 +324,154 @@ def get_financial_data(session, symbol):
         logger.error(f"Erreur lors de la récupération des données financières pour {symbol}: {str(e)}")
         return financial_data
 
-def create_interactive_dashboard(df):
-    """Créer un tableau de bord interactif avec Plotly."""
+def fetch_symbol_data(session, symbol, current_price):
+    """
+    Récupérer la capitalisation boursière et les données financières d'une valeur.
+    
+    Args:
+        session (requests.Session): Session HTTP partagée (débit limité, voir get_session)
+        symbol (str): Symbole de la valeur
+        current_price (float): Cours actuel
+        
+    Returns:
+        tuple: (capitalisation boursière, données financières)
+    """
+    logger.info(f"Récupération de la capitalisation boursière pour {symbol}...")
+    market_cap = get_market_cap(session, symbol, current_price)
+    
+    logger.info(f"Récupération des données financières pour {symbol}...")
+    financial_data = get_financial_data(session, symbol)
+    
+    return market_cap, financial_data
+
+def dividend_yield(df):
+    """
+    Calculer le rendement du dividende 2024 (en % du cours actuel).
+    
+    Returns:
+        pd.Series: Rendement de chaque valeur, NaN si le dividende ou le cours manque
+    """
+    dividend = df['div_2024'].astype('float64')
+    price = df['current_price'].astype('float64')
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(dividend.notna() & (price > 0), dividend / price * 100, np.nan)
+    return pd.Series(values, index=df.index)
+
+# Modèle de la page, compilé une seule fois au chargement du module
+DASHBOARD_TEMPLATE = jinja2.Template("""
+<!DOCTYPE html>
+<html lang="fr">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Classement des valeurs de la BRVM</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
+    <style>
+        body { font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f8f9fa; }
+        .container { max-width: 1400px; margin: 0 auto; }
+        .header { text-align: center; margin-bottom: 30px; }
+        .card { margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1); }
+        .chart-container { background-color: white; padding: 15px; border-radius: 5px; }
+        h1, h2 { color: #0d6efd; }
+        .table-container { overflow-x: auto; }
+        table { width: 100%; border-collapse: collapse; margin-bottom: 20px; }
+        th, td { padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background-color: #f8f9fa; color: #495057; font-weight: bold; }
+        tr:hover { background-color: #f8f9fa; }
+        .positive { color: #198754; }
+        .negative { color: #dc3545; }
+        .footer { text-align: center; margin-top: 30px; padding: 10px; color: #6c757d; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <div class="header">
+            <h1>Classement des valeurs de la BRVM</h1>
+            <p class="text-muted">Données extraites le {{ today }}</p>
+        </div>
+
+        <div class="row mb-4">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Tableau complet des valeurs classées par capitalisation boursière</h2>
+                    </div>
+                    <div class="card-body table-container">
+                        {{ table }}
+                    </div>
+                </div>
+            </div>
+        </div>
+
+        <div class="row mb-4">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Top 15 des valeurs par capitalisation boursière</h2>
+                    </div>
+                    <div class="card-body chart-container">
+                        {{ market_cap_chart }}
+                    </div>
+                </div>
+            </div>
+        </div>
+
+        <div class="row mb-4">
+            <div class="col-12">
+                <div class="card">
+                    <div class="card-header">
+                        <h2>Top 15 des valeurs par rendement du dividende</h2>
+                    </div>
+                    <div class="card-body chart-container">
+                        {{ dividend_yield_chart }}
+                    </div>
+                </div>
+            </div>
+        </div>
+
+        <div class="row mb-4">
+            <div class="col-md-6">
+                <div class="card h-100">
+                    <div class="card-header">
+                        <h2>Évolution du PER (2020-2024)</h2>
+                    </div>
+                    <div class="card-body chart-container">
+                        {{ per_chart }}
+                    </div>
+                </div>
+            </div>
+            <div class="col-md-6">
+                <div class="card h-100">
+                    <div class="card-header">
+                        <h2>Relation PER vs Rendement du dividende</h2>
+                    </div>
+                    <div class="card-body chart-container">
+                        {{ per_dividend_chart }}
+                    </div>
+                </div>
+            </div>
+        </div>
+
+        <div class="footer">
+            <p>© {{ year }} - Analyse des valeurs de la BRVM - Mis à jour le {{ today }}</p>
+            <p><a href="https://github.com/Kyac99/brvm-market-analysis" target="_blank">Voir le projet sur GitHub</a></p>
+        </div>
+    </div>
+
+    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+</body>
+</html>
+""")
+
+def create_interactive_dashboard(df, now=None):
+    """Créer un tableau de bord interactif avec Plotly.
+
+    `now` est la date de génération affichée sur la page (par défaut, l'instant
+    présent). Retourne un itérateur sur les fragments de la page HTML.
+    """
+    if now is None:
+        now = datetime.now()
+    
     # Filtrer les valeurs avec capitalisation boursière disponible
     df_filtered = df[df['market_cap'].notna()].copy()
     
@@ -315,23 +503,19 @@ def create_interactive_dashboard(df):
         margin=dict(l=50, r=50, b=100, t=100, pad=4)
     )
     
-    # Préparer les données pour le graphique PER
-    per_data = []
-    symbols = top_market_cap['symbol'].tolist()
-    
-    for symbol in symbols:
-        row = df[df['symbol'] == symbol].iloc[0]
-        for year in [2020, 2021, 2022, 2023, 2024]:
-            per_value = row[f'per_{year}']
-            if not pd.isna(per_value):
-                per_data.append({
-                    'symbol': symbol,
-                    'name': row['name'],
-                    'year': year,
-                    'per': per_value
-                })
-    
-    per_df = pd.DataFrame(per_data)
+    # Préparer les données pour le graphique PER : une ligne par valeur et par
+    # année, dans l'ordre des capitalisations puis des années
+    per_columns = [f'per_{year}' for year in FINANCIAL_YEARS]
+    per_df = (
+        top_market_cap[['symbol', 'name'] + per_columns]
+        .reset_index(drop=True)
+        .melt(id_vars=['symbol', 'name'], value_vars=per_columns,
+              var_name='year', value_name='per', ignore_index=False)
+        .sort_index(kind='stable')
+        .dropna(subset=['per'])
+        .reset_index(drop=True)
+    )
+    per_df['year'] = per_df['year'].str.slice(4).astype(int)
     
     # Graphique d'évolution du PER
     if not per_df.empty:
@@ -371,10 +555,7 @@ def create_interactive_dashboard(df):
         )
     
     # Top 15 des rendements de dividendes
-    df_filtered['dividend_yield'] = df_filtered.apply(
-        lambda row: (row['div_2024'] / row['current_price'] * 100) if not pd.isna(row['div_2024']) and row['current_price'] > 0 else None,
-        axis=1
-    )
+    df_filtered['dividend_yield'] = dividend_yield(df_filtered)
     
     top_div_yield = df_filtered[df_filtered['dividend_yield'].notna()].sort_values(by='dividend_yield', ascending=False).head(15)
     
@@ -446,121 +627,26 @@ def create_interactive_dashboard(df):
             )]
         )
     
-    # Formater la date pour le titre
-    today = datetime.now().strftime('%d/%m/%Y')
-    
-    # Combiner les graphiques en HTML
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="fr">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>Classement des valeurs de la BRVM</title>
-        <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-        <style>
-            body {{ font-family: Arial, sans-serif; margin: 0; padding: 20px; background-color: #f8f9fa; }}
-            .container {{ max-width: 1400px; margin: 0 auto; }}
-            .header {{ text-align: center; margin-bottom: 30px; }}
-            .card {{ margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1); }}
-            .chart-container {{ background-color: white; padding: 15px; border-radius: 5px; }}
-            h1, h2 {{ color: #0d6efd; }}
-            .table-container {{ overflow-x: auto; }}
-            table {{ width: 100%; border-collapse: collapse; margin-bottom: 20px; }}
-            th, td {{ padding: 12px 15px; text-align: left; border-bottom: 1px solid #ddd; }}
-            th {{ background-color: #f8f9fa; color: #495057; font-weight: bold; }}
-            tr:hover {{ background-color: #f8f9fa; }}
-            .positive {{ color: #198754; }}
-            .negative {{ color: #dc3545; }}
-            .footer {{ text-align: center; margin-top: 30px; padding: 10px; color: #6c757d; }}
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="header">
-                <h1>Classement des valeurs de la BRVM</h1>
-                <p class="text-muted">Données extraites le {today}</p>
-            </div>
-            
-            <div class="row mb-4">
-                <div class="col-12">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Tableau complet des valeurs classées par capitalisation boursière</h2>
-                        </div>
-                        <div class="card-body table-container">
-                            {df.to_html(classes='table table-striped table-hover', index=False, na_rep='-')}
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="row mb-4">
-                <div class="col-12">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Top 15 des valeurs par capitalisation boursière</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {fig1.to_html(full_html=False, include_plotlyjs='cdn')}
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="row mb-4">
-                <div class="col-12">
-                    <div class="card">
-                        <div class="card-header">
-                            <h2>Top 15 des valeurs par rendement du dividende</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {fig3.to_html(full_html=False, include_plotlyjs='cdn')}
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="row mb-4">
-                <div class="col-md-6">
-                    <div class="card h-100">
-                        <div class="card-header">
-                            <h2>Évolution du PER (2020-2024)</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {fig2.to_html(full_html=False, include_plotlyjs='cdn')}
-                        </div>
-                    </div>
-                </div>
-                <div class="col-md-6">
-                    <div class="card h-100">
-                        <div class="card-header">
-                            <h2>Relation PER vs Rendement du dividende</h2>
-                        </div>
-                        <div class="card-body chart-container">
-                            {fig4.to_html(full_html=False, include_plotlyjs='cdn')}
-                        </div>
-                    </div>
-                </div>
-            </div>
-            
-            <div class="footer">
-                <p>© {datetime.now().year} - Analyse des valeurs de la BRVM - Mis à jour le {today}</p>
-                <p><a href="https://github.com/Kyac99/brvm-market-analysis" target="_blank">Voir le projet sur GitHub</a></p>
-            </div>
-        </div>
-        
-        <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    </body>
-    </html>
-    """
-    
-    return html_content
+    # Générer la page à partir du modèle : les fragments sont produits au fil
+    # de l'eau pour être écrits directement sur disque
+    return DASHBOARD_TEMPLATE.generate(
+        today=now.strftime('%d/%m/%Y'),
+        year=now.year,
+        table=df.to_html(classes='table table-striped table-hover', index=False, na_rep='-',
+                         float_format=TABLE_FLOAT_FORMAT, formatters=TABLE_FORMATTERS),
+        market_cap_chart=fig1.to_html(full_html=False, include_plotlyjs='cdn', div_id='chart-market-cap'),
+        dividend_yield_chart=fig3.to_html(full_html=False, include_plotlyjs=False, div_id='chart-dividend-yield'),
+        per_chart=fig2.to_html(full_html=False, include_plotlyjs=False, div_id='chart-per'),
+        per_dividend_chart=fig4.to_html(full_html=False, include_plotlyjs=False, div_id='chart-per-dividend')
+    )
 
 def main():
     """Fonction principale pour mettre à jour le tableau de bord GitHub Pages."""
     logger.info("Démarrage de la mise à jour du tableau de bord pour GitHub Pages...")
     
+    # Date de la mise à jour, lue une seule fois pour la page, la copie datée et le README
+    now = datetime.now()
+    
     # Création des répertoires nécessaires
     docs_dir = "../docs"
     ensure_directory(docs_dir)
@@ -579,35 +665,19 @@ def main():
     # Créer un DataFrame avec les valeurs de base
     df_values = pd.DataFrame(values)
     
-    # Récupérer les capitalisations boursières
-    logger.info("Récupération des capitalisations boursières...")
-    market_caps = []
-    for index, row in df_values.iterrows():
-        symbol = row['symbol']
-        current_price = row['current_price']
-        
-        logger.info(f"Récupération de la capitalisation boursière pour {symbol}...")
-        market_cap = get_market_cap(session, symbol, current_price)
-        market_caps.append(market_cap)
-        
-        # Respecter une pause pour ne pas surcharger le serveur
-        time.sleep(1)
+    # Récupérer les capitalisations boursières et les données financières en
+    # parallèle, avec un débit limité pour ne pas surcharger le serveur
+    logger.info("Récupération des capitalisations boursières et des données financières...")
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+        futures = [
+            executor.submit(fetch_symbol_data, session, symbol, current_price)
+            for symbol, current_price in zip(df_values['symbol'].to_numpy(), df_values['current_price'].to_numpy())
+        ]
+        results = [future.result() for future in futures]
     
     # Ajouter les capitalisations au DataFrame
-    df_values['market_cap'] = market_caps
-    
-    # Récupérer les données financières pour chaque valeur
-    logger.info("Récupération des données financières...")
-    financial_data_list = []
-    for index, row in df_values.iterrows():
-        symbol = row['symbol']
-        
-        logger.info(f"Récupération des données financières pour {symbol}...")
-        financial_data = get_financial_data(session, symbol)
-        financial_data_list.append(financial_data)
-        
-        # Respecter une pause pour ne pas surcharger le serveur
-        time.sleep(1)
+    df_values['market_cap'] = [market_cap for market_cap, _ in results]
+    financial_data_list = [financial_data for _, financial_data in results]
     
     # Convertir la liste en DataFrame
     df_financial = pd.DataFrame(financial_data_list)
@@ -615,11 +685,11 @@ def main():
     # Joindre les deux DataFrames
     df_combined = pd.concat([df_values, df_financial], axis=1)
     
+    # Les secteurs forment un petit vocabulaire fixe : les stocker en catégorie
+    df_combined['sector'] = df_combined['sector'].astype('category')
+    
     # Calculer le rendement du dividende (dividende 2024 / cours actuel)
-    df_combined['dividend_yield'] = df_combined.apply(
-        lambda row: (row['div_2024'] / row['current_price'] * 100) if row['div_2024'] is not None and row['current_price'] > 0 else None,
-        axis=1
-    )
+    df_combined['dividend_yield'] = dividend_yield(df_combined)
     
     # Sélectionner les colonnes pertinentes pour l'affichage
     columns_to_display = [
@@ -640,16 +710,21 @@ def main():
     df_sorted = df_display.sort_values(by='market_cap', ascending=False).reset_index(drop=True)
     
     logger.info("Création du tableau de bord HTML interactif...")
-    html_dashboard = create_interactive_dashboard(df_sorted)
+    html_dashboard = create_interactive_dashboard(df_sorted, now)
     
-    # Sauvegarder le tableau de bord dans le dossier docs
+    # Sauvegarder le tableau de bord dans le dossier docs, ainsi qu'une copie
+    # datée compressée (gzip) pour garder un historique : les fragments de la page
+    # sont écrits au fil de l'eau dans les deux fichiers. index.html est écrit dans
+    # un fichier temporaire puis renommé, pour ne jamais publier une page partielle
     index_file = os.path.join(docs_dir, "index.html")
-    with open(index_file, 'w', encoding='utf-8') as f:
-        f.write(html_dashboard)
-    
-    # Sauvegarder aussi une copie datée pour garder un historique
-    dated_file = os.path.join(docs_dir, f"classement_brvm_{datetime.now().strftime('%Y%m%d')}.html")
-    shutil.copy2(index_file, dated_file)
+    tmp_file = f"{index_file}.tmp"
+    dated_file = os.path.join(docs_dir, f"classement_brvm_{now.strftime('%Y%m%d')}.html.gz")
+    with open(tmp_file, 'w', encoding='utf-8') as f, \
+            gzip.open(dated_file, 'wt', encoding='utf-8', compresslevel=6) as compressed:
+        for fragment in html_dashboard:
+            f.write(fragment)
+            compressed.write(fragment)
+    os.replace(tmp_file, index_file)
     
     logger.info(f"Tableau de bord mis à jour: {index_file}")
     logger.info(f"Copie datée sauvegardée: {dated_file}")
@@ -661,8 +736,8 @@ def main():
 
 Ce dossier contient les fichiers HTML du tableau de bord des valeurs mobilières cotées à la Bourse Régionale des Valeurs Mobilières (BRVM).
 
-- **index.html** : Tableau de bord actuel, mis à jour le {datetime.now().strftime('%d/%m/%Y')}
-- Des copies datées du tableau de bord sont également disponibles pour garder un historique des analyses
+- **index.html** : Tableau de bord actuel, mis à jour le {now.strftime('%d/%m/%Y')}
+- **classement_brvm_AAAAMMJJ.html.gz** : Copies datées du tableau de bord, compressées avec gzip, pour garder un historique des analyses
 
 Ce tableau de bord est généré automatiquement par le script `scripts/update_dashboard.py`.
 